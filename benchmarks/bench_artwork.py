@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Time and output size of the artwork pipeline versus the old resize loop.
+
+Usage: python3 benchmarks/bench_artwork.py [--repeat N] [--edge PX] [FILE ...]
+
+Without FILE arguments a set of covers at common store sizes (1400,
+3000 and 4000 px JPEGs and a 3000 px PNG) is generated with photo-like
+noise, so they compress like real scans rather than flat colour.
+- loop: the former resize_and_save_artwork: encode as JPEG, and while the
+  result is over 500 KB shrink by 0.8 with LANCZOS, drop quality by 10
+  and encode again.
+- single: render_artwork at --edge px: draft/reduce while decoding, one
+  LANCZOS resize, one PNG encode.
+- cache fill: what ArtworkCache does on a cover's first play (all of
+  THUMBNAIL_SIZES from one decode).
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+
+from musiccore.artwork_cache import ArtworkCache
+from musiccore.artwork_render import render_artwork
+
+LOOP_MAX_BYTES = 500_000
+
+
+def resize_loop(artwork):
+    img = Image.open(io.BytesIO(artwork))
+    quality = 85
+    scale_factor = 1.0
+    while True:
+        output = io.BytesIO()
+        img.save(output, format="JPEG", quality=quality)
+        resized_data = output.getvalue()
+        if len(resized_data) <= LOOP_MAX_BYTES or quality <= 10:
+            return resized_data
+        scale_factor *= 0.8
+        new_width = int(img.width * scale_factor)
+        new_height = int(img.height * scale_factor)
+        img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+        quality -= 10
+
+
+def make_cover(edge, fmt):
+    gradient = Image.linear_gradient('L').resize((edge, edge))
+    noise = Image.effect_noise((edge, edge), 48)
+    img = Image.merge('RGB', (gradient, noise, gradient.rotate(90)))
+    output = io.BytesIO()
+    img.save(output, format=fmt, **({'quality': 95} if fmt == 'JPEG' else {}))
+    return output.getvalue()
+
+
+def timed(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('files', nargs='*')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--edge', type=int, default=240, help="Target edge for the single render")
+    args = parser.parse_args()
+
+    if args.files:
+        covers = []
+        for path in args.files:
+            with open(path, 'rb') as f:
+                covers.append((os.path.basename(path), f.read()))
+    else:
+        covers = [(f"{edge}px {fmt}", make_cover(edge, fmt))
+                  for edge, fmt in ((1400, 'JPEG'), (3000, 'JPEG'), (4000, 'JPEG'), (3000, 'PNG'))]
+
+    cache = ArtworkCache(cache_dir=os.devnull)  # only _render is used; nothing is written
+    print(f"{'cover':<14} {'input':>8}  {'loop':>16}  {'single':>16}  {'cache fill':>16}")
+    for name, artwork in covers:
+        loop_time, loop_out = timed(lambda: resize_loop(artwork), args.repeat)
+        single_time, single_out = timed(lambda: render_artwork(artwork, args.edge), args.repeat)
+        fill_time, fill_out = timed(lambda: cache._render(artwork), args.repeat)
+        fill_size = sum(len(data) for data in fill_out.values())
+        print(f"{name:<14} {len(artwork) // 1024:>6}KB  "
+              f"{loop_time * 1000:>6.0f}ms {len(loop_out) // 1024:>5}KB  "
+              f"{single_time * 1000:>6.0f}ms {len(single_out) // 1024:>5}KB  "
+              f"{fill_time * 1000:>6.0f}ms {fill_size // 1024:>5}KB")
+
+
+if __name__ == "__main__":
+    main()
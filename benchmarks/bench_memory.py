@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Memory held by the library with and without retained mutagen objects.
+
+Usage: python3 benchmarks/bench_memory.py [--tracks N] [--art-kb KB]
+
+Writes one FLAC file with an embedded picture, hard-links it N times and
+measures (tracemalloc) what a library of N entries keeps alive when every
+entry holds its mutagen object ('audio_obj') versus plain metadata.
+"""
+
+import argparse
+import gc
+import os
+import struct
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mutagen import File
+from mutagen.flac import FLAC, Picture
+
+from musiccore.track_metadata import read_metadata
+
+
+def write_flac(path, art_bytes):
+    # STREAMINFO: 4096-sample blocks, 44.1 kHz, stereo, 16 bit, no audio frames
+    info = struct.pack('>HH', 4096, 4096) + b'\x00' * 6
+    info += struct.pack('>Q', (44100 << 44) | (1 << 41) | (15 << 36)) + b'\x00' * 16
+    with open(path, 'wb') as f:
+        f.write(b'fLaC' + bytes([0x80]) + len(info).to_bytes(3, 'big') + info)
+
+    audio = FLAC(path)
+    audio['artist'] = 'Benchmark Artist'
+    audio['title'] = 'Benchmark Title'
+    picture = Picture()
+    picture.type = 3
+    picture.mime = 'image/jpeg'
+    picture.data = art_bytes
+    audio.add_picture(picture)
+    audio.save()
+
+
+def make_library(root, tracks, art_kb):
+    master = os.path.join(root, 'master.flac')
+    write_flac(master, os.urandom(art_kb * 1024))
+    paths = []
+    for i in range(tracks):
+        path = os.path.join(root, f"track{i:05d}.flac")
+        os.link(master, path)
+        paths.append(path)
+    return paths
+
+
+def build_with_audio_obj(paths):
+    library = {}
+    for idx, song_path in enumerate(paths):
+        audio = File(song_path, easy=True)
+        library[idx] = {
+            'path': song_path,
+            'artist': audio['artist'][0],
+            'title': audio['title'][0],
+            'audio_obj': audio
+        }
+    return library
+
+
+def build_metadata_only(paths):
+    return dict(enumerate(read_metadata(song_path) for song_path in paths))
+
+
+def measure(label, build, paths):
+    gc.collect()
+    tracemalloc.start()
+    library = build(paths)
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<22} retained {current / 2**20:9.1f} MiB  peak {peak / 2**20:9.1f} MiB"
+          f"  ({len(library)} tracks)")
+    return current
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tracks', type=int, default=5000)
+    parser.add_argument('--art-kb', type=int, default=64,
+                        help="Size of the embedded picture (retained memory grows with tracks x art)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = make_library(tmp, args.tracks, args.art_kb)
+        old = measure("with 'audio_obj'", build_with_audio_obj, paths)
+        new = measure("metadata only", build_metadata_only, paths)
+        print(f"Reduction: {old / max(new, 1):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Time from a play command to the first audio frame, per playback backend.
+
+Usage: python3 benchmarks/bench_playback.py [--runs N] [--file PATH]
+
+Both backends write to a null audio sink (SDL dummy driver for ffplay,
+--ao=null for mpv), so no sound device is needed.
+- ffplay: a new process per play; the first audio frame is taken to be
+  the first status line ffplay prints once its audio queue is running.
+- mpv: one process for all runs; each run is a 'loadfile' command and
+  the first frame is mpv's 'playback-restart' event.
+"""
+
+import argparse
+import math
+import os
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from musiccore.playback import FfplayBackend, MpvBackend
+
+
+def write_tone(path, seconds=5, rate=44100):
+    frames = b''.join(struct.pack('<hh', v, v) for v in
+                      (int(12000 * math.sin(2 * math.pi * 440 * i / rate)) for i in range(rate * seconds)))
+    with wave.open(path, 'wb') as w:
+        w.setnchannels(2)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(frames)
+
+
+def ffplay_first_frame(path, timeout=10.0):
+    env = dict(os.environ, SDL_AUDIODRIVER='dummy')
+    start = time.perf_counter()
+    process = subprocess.Popen(FfplayBackend.command(path), env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    seen = b''
+    try:
+        while time.perf_counter() - start < timeout:
+            chunk = os.read(process.stderr.fileno(), 4096)
+            if not chunk:
+                return None
+            seen = seen[-64:] + chunk
+            # Status lines ("  0.05 M-A: ... aq=  16KB ...") start once audio is flowing
+            if b'aq=' in seen:
+                return time.perf_counter() - start
+        return None
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def mpv_first_frame(backend, path, timeout=10.0):
+    backend.clear_events()
+    start = time.perf_counter()
+    backend.play(path)
+    event = backend.wait_for_event('playback-restart', timeout)
+    return None if event is None else time.perf_counter() - start
+
+
+def report(label, times):
+    times = [t for t in times if t is not None]
+    if not times:
+        print(f"{label:<8} no measurements")
+        return
+    times.sort()
+    print(f"{label:<8} median {times[len(times) // 2] * 1000:7.1f} ms  "
+          f"min {times[0] * 1000:7.1f} ms  max {times[-1] * 1000:7.1f} ms  ({len(times)} runs)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--file', help="Audio file to play (default: a generated 5 s WAV tone)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.file
+        if path is None:
+            path = os.path.join(tmp, 'tone.wav')
+            write_tone(path)
+
+        if shutil.which('ffplay'):
+            report('ffplay', [ffplay_first_frame(path) for _ in range(args.runs)])
+        else:
+            print("ffplay   not installed, skipped")
+
+        if shutil.which('mpv'):
+            backend = MpvBackend(null_audio=True)
+            try:
+                mpv_first_frame(backend, path)  # warm-up: mpv itself starts only once
+                report('mpv', [mpv_first_frame(backend, path) for _ in range(args.runs)])
+            finally:
+                backend.close()
+        else:
+            print("mpv      not installed, skipped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""Per-operation cost of PlayQueue as the queue grows.
+
+Usage: python3 benchmarks/bench_queue.py [--sizes 1000,10000,100000] [--ops N]
+
+For each size the queue is filled, then --ops songs are added, played in
+order, drawn in shuffle mode and stepped back through. Adding, playing
+on, shuffle draws and going back should all stay flat from the
+smallest queue to the largest.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from musiccore.play_queue import PlayQueue
+
+
+def per_op(fn, ops):
+    start = time.perf_counter()
+    for _ in range(ops):
+        fn()
+    return (time.perf_counter() - start) / ops * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='1000,10000,100000')
+    parser.add_argument('--ops', type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"{'size':>8} {'add':>8} {'next':>8} {'shuffle':>8} {'back':>8}  (us per op)")
+    for size in (int(s) for s in args.sizes.split(',')):
+        queue = PlayQueue()
+        queue.extend(range(size))
+        add = per_op(lambda: queue.add(0), args.ops)
+
+        def play_next():
+            queue.advance(queue.peek())
+
+        forward = per_op(play_next, args.ops)
+        queue.set_shuffle(True)
+        shuffled = per_op(play_next, args.ops)
+        back = per_op(queue.back, args.ops)
+        print(f"{size:>8} {add:8.2f} {forward:8.2f} {shuffled:8.2f} {back:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Compare the single-pass scandir scanner with the old per-format glob loop.
+
+Usage: python3 benchmarks/bench_scan.py [--files N] [--dir PATH]
+
+Builds a synthetic tree of empty files (artist/album/track layout, with a
+share of non-audio files and upper-case extensions) and times both scans.
+"""
+
+import argparse
+import glob
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from musiccore.library_scanner import scan_music_files
+
+OLD_FORMATS = ('.mp3', '.flac', '.wav', '.ogg')
+EXTENSIONS = ('.mp3', '.flac', '.ogg', '.wav', '.MP3', '.FLAC', '.jpg', '.txt')
+
+
+def make_tree(root, n_files, tracks_per_album=12, albums_per_artist=8):
+    created = 0
+    artist = 0
+    while created < n_files:
+        for album in range(albums_per_artist):
+            album_dir = os.path.join(root, f"artist{artist:05d}", f"album{album:02d}")
+            os.makedirs(album_dir, exist_ok=True)
+            for track in range(tracks_per_album):
+                if created >= n_files:
+                    return
+                ext = EXTENSIONS[created % len(EXTENSIONS)]
+                open(os.path.join(album_dir, f"{track:02d} track{ext}"), 'wb').close()
+                created += 1
+        artist += 1
+
+
+def glob_scan(music_dir):
+    files = []
+    for fmt in OLD_FORMATS:
+        files.extend(glob.glob(f"{music_dir}/**/*{fmt}", recursive=True))
+    return files
+
+
+def timed(label, func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{label:<24} {best * 1000:10.1f} ms  {len(result):8d} files")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--files', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--dir', help="Scan an existing directory instead of a synthetic tree")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        music_dir = args.dir
+        if music_dir is None:
+            print(f"Building synthetic tree with {args.files} files...")
+            make_tree(tmp, args.files)
+            music_dir = tmp
+
+        old = timed("glob per format", lambda: glob_scan(music_dir), args.repeat)
+        new = timed("scandir single pass", lambda: list(scan_music_files(music_dir)), args.repeat)
+        print(f"Speedup: {old / new:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
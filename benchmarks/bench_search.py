@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Latency of LibrarySearch queries on a large synthetic library.
+
+Usage: python3 benchmarks/bench_search.py [--tracks N] [--budget-ms MS]
+
+Builds a TrackTable of N tracks whose artist and title words are drawn
+from a generated vocabulary with Zipf-like frequencies, then times
+prefix, substring and fuzzy (typo) queries asking for as many results as
+the front-ends do (SEARCH_RESULT_LIMIT). Exits non-zero if the slowest
+query exceeds the budget.
+"""
+
+import argparse
+import itertools
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from musiccore.library_search import LibrarySearch, SEARCH_RESULT_LIMIT
+from musiccore.track_table import TrackTable
+
+SYLLABLES = ['ka', 'lo', 'mi', 'ra', 'ten', 'sun', 'vel', 'dor', 'is', 'an', 'bri', 'qu',
+             'ost', 'el', 'yor', 'fa', 'nim', 'ux', 'ze', 'pha', 'gro', 'wen', 'tha', 'cor',
+             'li', 'be', 'sto', 'mar', 'dy', 'ne', 'hol', 'ju', 'pe', 'rin', 'ska', 'tu',
+             'vo', 'wi', 'ack', 'mo', 'sel', 'ga', 'ter', 'ri', 'bo', 'cha', 'dem', 'fi']
+
+
+def make_vocabulary(rng, size):
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 4))))
+    return sorted(words)
+
+
+def make_library(n, seed=1, vocabulary_size=30_000):
+    # Word frequencies follow a Zipf-like curve, as in real titles and names
+    rng = random.Random(seed)
+    vocabulary = make_vocabulary(rng, vocabulary_size)
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(vocabulary))))
+    rng.shuffle(vocabulary)
+
+    def words(count):
+        return rng.choices(vocabulary, cum_weights=cum_weights, k=count)
+
+    artists = [' '.join(words(rng.randint(1, 3))).title() for _ in range(max(1, n // 40))]
+    table = TrackTable()
+    for i in range(n):
+        title = ' '.join(words(rng.randint(1, 5))).capitalize()
+        table.append(f"/music/{i}.flac", rng.choice(artists), title)
+    return table
+
+
+def queries(table, rng, count):
+    # Drawn from real rows so every kind of query has matches
+    for _ in range(count):
+        idx = rng.randrange(len(table))
+        label = f"{table.artist(idx)} - {table.titles[idx]}".lower()
+        words = label.replace('-', ' ').split()
+        w = rng.choice(words)
+        yield 'prefix', w[:rng.randint(1, len(w))]
+        start = rng.randrange(max(1, len(label) - 6))
+        yield 'substring', label[start:start + 6]
+        typo = list(rng.choice(words) + ' ' + rng.choice(words))
+        typo[rng.randrange(len(typo))] = 'x'
+        yield 'fuzzy', ''.join(typo)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tracks', type=int, default=500_000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--budget-ms', type=float, default=10.0)
+    args = parser.parse_args()
+
+    table = make_library(args.tracks)
+    start = time.perf_counter()
+    search = LibrarySearch(table)
+    print(f"Index build: {time.perf_counter() - start:.2f} s for {len(table)} tracks")
+
+    timings = {}
+    for kind, query in queries(table, random.Random(2), args.queries):
+        start = time.perf_counter()
+        search.search(query, limit=SEARCH_RESULT_LIMIT)
+        timings.setdefault(kind, []).append((time.perf_counter() - start) * 1000)
+
+    worst = 0.0
+    for kind, values in timings.items():
+        values.sort()
+        p50 = values[len(values) // 2]
+        p99 = values[min(len(values) - 1, int(len(values) * 0.99))]
+        worst = max(worst, values[-1])
+        print(f"{kind:<10} p50 {p50:6.2f} ms  p99 {p99:6.2f} ms  max {values[-1]:6.2f} ms")
+
+    ok = worst <= args.budget_ms
+    print(f"Slowest query {worst:.2f} ms: {'within' if ok else 'OVER'} {args.budget_ms} ms budget")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Startup cost of each entry point: import time and time to first prompt.
+
+Usage: python3 benchmarks/bench_startup.py [--repeat N] [--top N] [SCRIPT ...]
+
+For every script (by default all musicplayer*.py and guimusicplayer*.py):
+- import: total of Python's -X importtime self times when the module is
+  imported without running main, plus the modules with the largest self
+  time, so a heavy dependency that sneaks back in shows up.
+- first prompt: wall time from launching the terminal players until the
+  directory browser's "> " prompt reaches stdout. The GUI players need a
+  display to show anything, so they only get the import measurement.
+Each figure is the best of --repeat runs.
+"""
+
+import argparse
+import glob
+import os
+import select
+import subprocess
+import sys
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROMPT = b"> "
+PROMPT_TIMEOUT = 30
+
+
+def import_times(module):
+    """Return (total self time in us, {module: self us}) for importing module."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+                            cwd=REPO, capture_output=True, text=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(self_us)
+    return sum(times.values()), times
+
+
+def time_to_prompt(script):
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, script], cwd=REPO,
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    output = b''
+    try:
+        while not output.endswith(PROMPT):
+            remaining = PROMPT_TIMEOUT - (time.perf_counter() - start)
+            if remaining <= 0 or not select.select([proc.stdout], [], [], remaining)[0]:
+                return None
+            chunk = os.read(proc.stdout.fileno(), 4096)
+            if not chunk:
+                return None  # exited without prompting
+            output += chunk
+        return time.perf_counter() - start
+    finally:
+        proc.kill()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('scripts', nargs='*')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=3, help="Slowest imports to list per script")
+    args = parser.parse_args()
+
+    scripts = args.scripts or sorted(os.path.basename(path) for path in
+                                     glob.glob(os.path.join(REPO, '*musicplayer*.py')))
+    print(f"{'script':<28} {'import':>9} {'first prompt':>13}  slowest imports")
+    for script in scripts:
+        module = os.path.splitext(os.path.basename(script))[0]
+        runs = [import_times(module) for _ in range(args.repeat)]
+        total, times = min(runs, key=lambda run: run[0])
+        if module.startswith('gui'):
+            prompt = "(no display)"
+        else:
+            waits = [t for t in (time_to_prompt(script) for _ in range(args.repeat)) if t is not None]
+            prompt = f"{min(waits) * 1000:.0f}ms" if waits else "no prompt"
+        slowest = sorted(times.items(), key=lambda item: item[1], reverse=True)[:args.top]
+        names = ", ".join(f"{name} {us / 1000:.1f}ms" for name, us in slowest)
+        print(f"{module:<28} {total / 1000:>7.1f}ms {prompt:>13}  {names}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""Tag reading throughput: the header-only reader versus mutagen.File.
+
+Usage: python3 benchmarks/bench_tags.py [--files N] [--cover-kib K] [--dir PATH]
+
+Builds MP3 (ID3v2.4 with an APIC cover), FLAC (with a PICTURE block), Ogg
+Vorbis and WAV files, or reads the audio files under --dir, and reads every
+file with read_metadata(header_only=True) and read_metadata(header_only=False).
+Reports files per second and bytes read per file (from /proc/self/io, so
+Linux only), and checks both paths return the same fields. Files are read
+in this process, with the page cache warm, so the numbers are the parsing
+and reading the library scan does per file, not disk speed.
+"""
+
+import argparse
+import os
+import struct
+import sys
+import tempfile
+import time
+import wave
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from musiccore.library_scanner import scan_music_files
+from musiccore.track_metadata import read_metadata
+
+# One MPEG-1 layer III frame: 128 kbit/s, 44.1 kHz, joint stereo, silent
+MP3_FRAME = b'\xff\xfb\x90\x64' + b'\0' * 413
+
+
+def tag_values(i):
+    return {'artist': f"Artist {i % 40}", 'title': f"Song {i}", 'album': f"Album {i % 400}",
+            'tracknumber': f"{i % 12 + 1}/12", 'discnumber': "1", 'date': "2004-05-01"}
+
+
+def make_mp3(path, i, cover):
+    from mutagen.id3 import ID3, APIC, TALB, TDRC, TIT2, TPE1, TPOS, TRCK
+    with open(path, 'wb') as f:
+        f.write(MP3_FRAME * 200)
+    values = tag_values(i)
+    tags = ID3()
+    for frame, key in ((TPE1, 'artist'), (TIT2, 'title'), (TALB, 'album'), (TRCK, 'tracknumber'),
+                       (TPOS, 'discnumber'), (TDRC, 'date')):
+        tags.add(frame(encoding=3, text=values[key]))
+    tags.add(APIC(encoding=3, mime='image/jpeg', type=3, desc='Cover', data=cover))
+    tags.save(path)
+
+
+def make_flac(path, i, cover):
+    from mutagen.flac import FLAC, Picture
+    # STREAMINFO only: 44.1 kHz, 2 channels, 16 bits, 30 s of samples
+    info = struct.pack('>HH', 4096, 4096) + b'\0' * 6
+    info += ((44100 << 44) | (1 << 41) | (15 << 36) | (44100 * 30)).to_bytes(8, 'big') + b'\0' * 16
+    with open(path, 'wb') as f:
+        f.write(b'fLaC' + bytes([0x80]) + len(info).to_bytes(3, 'big') + info + b'\0' * 100000)
+    audio = FLAC(path)
+    audio.update(tag_values(i))
+    picture = Picture()
+    picture.type, picture.mime, picture.data = 3, 'image/jpeg', cover
+    audio.add_picture(picture)
+    audio.save()
+
+
+def make_ogg(path, i, cover):
+    from mutagen.ogg import OggPage
+    from mutagen.oggvorbis import OggVorbis
+
+    def page(packets, sequence, position, first=False, last=False):
+        p = OggPage()
+        p.packets, p.serial, p.sequence, p.position = packets, 1234, sequence, position
+        p.first, p.last = first, last
+        return p.write()
+
+    ident = b'\x01vorbis' + struct.pack('<IBI3iBB', 0, 2, 44100, 0, 128000, 0, 0xB8, 1)
+    comments = b'\x03vorbis' + struct.pack('<I', 0) + struct.pack('<I', 0) + b'\x01'
+    with open(path, 'wb') as f:
+        f.write(page([ident], 0, 0, first=True))
+        f.write(page([comments, b'\x05vorbis'], 1, 0))
+        f.write(page([b'\0' * 4000] * 8, 2, 44100 * 20))
+        f.write(page([b'\0' * 4000], 3, 44100 * 30, last=True))
+    audio = OggVorbis(path)
+    audio.update(tag_values(i))
+    audio['metadata_block_picture'] = [cover.hex()]  # stands in for a base64 cover
+    audio.save()
+
+
+def make_wav(path, i, cover):
+    with wave.open(path, 'wb') as w:
+        w.setnchannels(2)
+        w.setsampwidth(2)
+        w.setframerate(44100)
+        w.writeframes(b'\0' * 44100 * 4)
+
+
+MAKERS = (('mp3', make_mp3), ('flac', make_flac), ('ogg', make_ogg), ('wav', make_wav))
+
+
+def make_files(root, n_files, cover_bytes):
+    cover = os.urandom(cover_bytes)
+    paths = []
+    for i in range(n_files):
+        ext, make = MAKERS[i % len(MAKERS)]
+        path = os.path.join(root, f"{i:05d}.{ext}")
+        make(path, i, cover)
+        paths.append(path)
+    return paths
+
+
+def bytes_read():
+    try:
+        with open('/proc/self/io') as f:
+            for line in f:
+                if line.startswith('rchar:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def measure(label, paths, header_only, repeat):
+    best = None
+    for _ in range(repeat):
+        before = bytes_read()
+        start = time.perf_counter()
+        results = [read_metadata(path, header_only=header_only) for path in paths]
+        elapsed = time.perf_counter() - start
+        after = bytes_read()
+        best = elapsed if best is None else min(best, elapsed)
+    per_file = "n/a" if before is None else f"{(after - before) / len(paths) / 1024:9.1f} KiB"
+    print(f"{label:<14} {len(paths) / best:9.0f} files/s  {per_file} read per file")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--files', type=int, default=400)
+    parser.add_argument('--cover-kib', type=int, default=512, help="Size of the embedded covers")
+    parser.add_argument('--dir', help="Read these audio files instead of generated ones")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.dir:
+            paths = list(scan_music_files(args.dir))
+        else:
+            paths = make_files(tmp, args.files, args.cover_kib * 1024)
+        if not paths:
+            print("No audio files found")
+            return
+        # Imported up front so neither path pays for it inside the timing
+        import mutagen.mp3, mutagen.flac, mutagen.oggvorbis, mutagen.wave  # noqa: F401
+        print(f"{len(paths)} files")
+        slow = measure("mutagen.File", paths, False, args.repeat)
+        fast = measure("header only", paths, True, args.repeat)
+
+    mismatches = [(a, b) for a, b in zip(slow, fast) if a != b]
+    print(f"{len(mismatches)} files with different fields")
+    for a, b in mismatches[:5]:
+        print(f"  mutagen: {a}\n  header:  {b}")
+
+
+if __name__ == "__main__":
+    main()
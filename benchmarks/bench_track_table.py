@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""Memory and iteration cost of TrackTable versus the old dict-of-dicts library.
+
+Usage: python3 benchmarks/bench_track_table.py [--tracks N]
+
+TrackTable is built twice: from rows carrying their stored track IDs, as
+LibraryIndex.load does, and from bare records, where extend() hashes every
+path for its ID. Lookups are timed through table[idx], which makes a
+Track, and straight from the column (table.paths[idx]); iteration goes
+through rows(), and its time is also given relative to the dicts'.
+"""
+
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from musiccore.track_table import path_track_id, TrackTable
+
+REPEAT = 3
+
+
+def records(n, tracks_per_album=12, albums_per_artist=6):
+    for i in range(n):
+        album = i // tracks_per_album
+        artist = album // albums_per_artist
+        # Built per record, as tag reading would, so equal strings are distinct objects
+        yield {
+            'path': f"/music/Artist {artist}/Album {album}/{i % tracks_per_album:02d} Song {i}.flac",
+            'artist': f"Artist {artist}",
+            'title': f"Song {i}",
+            'album': f"Album {album}"
+        }
+
+
+def build_dicts(n):
+    return {idx: record for idx, record in enumerate(records(n))}
+
+
+def build_table(n):
+    return TrackTable.from_records(records(n))
+
+
+def build_table_from_index(n, track_ids):
+    # Index rows: every TRACK_FIELDS value, the numeric ones unknown here
+    unknown = (None,) * 8
+    table = TrackTable()
+    table.extend((record['path'], record['artist'], record['title'], record['album']) + unknown + (track_id,)
+                 for record, track_id in zip(records(n), track_ids))
+    return table
+
+
+def timed(function):
+    # Best of REPEAT runs
+    best = None
+    for _ in range(REPEAT):
+        gc.collect()
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def measure(label, build, n, baseline=None):
+    gc.collect()
+    tracemalloc.start()
+    library = build(n)
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Timed separately, tracemalloc slows allocation down a lot
+    del library
+    build_time, library = timed(lambda: build(n))
+
+    if isinstance(library, TrackTable):
+        iter_time, lines = timed(lambda: [f"{idx}: {artist} - {title}" for idx, artist, title in library.rows()])
+        column_time, _ = timed(lambda: [library.paths[idx] for idx in range(0, n, 7)])
+    else:
+        iter_time, lines = timed(lambda: [f"{idx}: {song['artist']} - {song['title']}"
+                                          for idx, song in library.items()])
+        column_time = None
+
+    lookup_time, _ = timed(lambda: [library[idx]['path'] for idx in range(0, n, 7)])
+
+    line = (f"{label:<20} {current / 2**20:8.1f} MiB  build {build_time * 1000:8.1f} ms"
+            f"  iterate {iter_time * 1000:7.1f} ms")
+    if baseline is not None:
+        line += f" ({iter_time / baseline:4.2f}x)"
+    line += f"  lookup {lookup_time * 1000:6.1f} ms"
+    if column_time is not None:
+        line += f", column {column_time * 1000:5.1f} ms"
+    print(f"{line}  ({len(lines)} tracks)")
+    return iter_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tracks', type=int, default=300_000)
+    args = parser.parse_args()
+
+    baseline = measure("dict of dicts", build_dicts, args.tracks)
+    # The index stores the IDs, so they are worked out here, outside the measurements
+    track_ids = [path_track_id(record['path']) for record in records(args.tracks)]
+    measure("TrackTable", lambda n: build_table_from_index(n, track_ids), args.tracks, baseline)
+    measure("TrackTable, hashing", build_table, args.tracks, baseline)
+
+
+if __name__ == "__main__":
+    main()
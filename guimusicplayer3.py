@@ -1,191 +1,354 @@
 #!/usr/bin/env python3
 
+import argparse
 import os
-import subprocess
-import glob
-from pathlib import Path
-from mutagen import File
+import queue
+import threading
+import time
+from musiccore.library_index import add_scan_arguments, ScanCancelled, SCAN_CACHED
+from musiccore.library_search import LibrarySearch
+from musiccore.library_views import use_locale_collation, VIEWS
+from musiccore.playback import add_playback_arguments
+from musiccore.tk_player import detach_from_terminal, PURPLE_THEME, TkPlayer
+from musiccore.track_table import format_duration, TrackTable
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 
+SCAN_POLL_MS = 100              # how often the Tk loop drains scan results
+SCAN_BATCH_SIZE = 500           # tracks per queue message
+SCAN_MAX_BATCHES_PER_TICK = 20
+SEARCH_DELAY_MS = 150           # typing pause before a search runs
+PLAYER_POLL_MS = 200            # how often the Tk loop picks up song changes
 
-def run_gui():
-    """Function to run the GUI."""
 
-    class MusicPlayer:
-        def __init__(self):
-            self.music_library = {}
-            self.current_song = None
-            self.process = None
-            self.is_playing = False
-            self.supported_formats = ('.mp3', '.flac', '.wav', '.ogg')
-            self.root = tk.Tk()
-            self.root.title("Purple Future Music Player")
-            self.root.geometry("600x400")
-            self.setup_theme()
-            self.setup_gui()
-
-        def setup_theme(self):
-            style = ttk.Style()
-            style.theme_use('default')
-
-            dark_purple = "#2a1a4a"
-            light_purple = "#6b5b95"
-            neon_purple = "#9b59b6"
-            text_color = "#e8e8e8"
-
-            self.root.configure(bg=dark_purple)
-            style.configure("TFrame", background=dark_purple)
-            style.configure("TButton",
-                            background=light_purple,
-                            foreground=text_color,
-                            borderwidth=1,
-                            font=("Arial", 10, "bold"))
-            style.map("TButton",
-                      background=[("active", neon_purple)],
-                      foreground=[("active", text_color)])
-            style.configure("TLabel",
-                            background=dark_purple,
-                            foreground=text_color,
-                            font=("Arial", 10))
-
-            self.root.option_add("*Listbox.background", dark_purple)
-            self.root.option_add("*Listbox.foreground", text_color)
-            self.root.option_add("*Listbox.selectBackground", neon_purple)
-            self.root.option_add("*Listbox.selectForeground", text_color)
-            self.root.option_add("*Listbox.font", ("Arial", 10))
-
-        def browse_directory(self):
-            browse_window = tk.Toplevel(self.root)
-            browse_window.title("Select Music Directory")
-            browse_window.geometry("400x300")
-            browse_window.configure(bg="#2a1a4a")
-
-            current_dir = tk.StringVar(value="/")
-            dir_listbox = tk.Listbox(browse_window, height=15)
-            dir_listbox.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-
-            def update_dir_list():
-                dir_listbox.delete(0, tk.END)
-                dirs = [d for d in os.listdir(current_dir.get())
-                        if os.path.isdir(os.path.join(current_dir.get(), d))]
-                dirs.sort()
-                for d in dirs:
-                    dir_listbox.insert(tk.END, d)
-                self.root.update()
-
-            def go_to_dir(event):
-                selection = dir_listbox.curselection()
-                if selection:
-                    new_dir = os.path.join(current_dir.get(), dir_listbox.get(selection[0]))
-                    current_dir.set(new_dir)
-                    update_dir_list()
-
-            def go_parent():
-                parent = os.path.dirname(current_dir.get())
-                if parent != current_dir.get():
-                    current_dir.set(parent)
-                    update_dir_list()
-
-            def select_dir():
-                self.music_dir = current_dir.get()
-                browse_window.destroy()
-                self.build_library()
-
-            ttk.Label(browse_window, textvariable=current_dir).pack(pady=5)
-            dir_listbox.bind("<Double-1>", go_to_dir)
-            update_dir_list()
-
-            ttk.Button(browse_window, text="Parent", command=go_parent).pack(side=tk.LEFT, padx=5, pady=5)
-            ttk.Button(browse_window, text="Select", command=select_dir).pack(side=tk.RIGHT, padx=5, pady=5)
-
-        def build_library(self):
-            self.music_library.clear()
-            self.song_listbox.delete(0, tk.END)
-            files = []
-            for fmt in self.supported_formats:
-                files.extend(glob.glob(f"{self.music_dir}/**/*{fmt}", recursive=True))
-
-            for idx, song_path in enumerate(files):
-                try:
-                    audio = File(song_path, easy=True)
-                    if audio is None:
-                        continue
-                    artist = audio.get('artist', ['Unknown'])[0] if 'artist' in audio else 'Unknown'
-                    title = audio.get('title', ['Unknown'])[0] if 'title' in audio else Path(song_path).stem
-                    self.music_library[idx] = {'path': song_path, 'artist': artist, 'title': title}
-                    self.song_listbox.insert(tk.END, f"{artist} - {title}")
-                except Exception as e:
-                    print(f"Skipping {song_path}: {str(e)}")
-            self.status_label.config(text=f"Found {len(self.music_library)} songs")
-
-        def play_song(self, song_idx=None):
-            if song_idx is None:
-                selection = self.song_listbox.curselection()
-                if not selection:
-                    return
-                song_idx = selection[0]
-
-            if song_idx not in self.music_library:
-                messagebox.showerror("Error", "Invalid song selection")
-                return
-
-            if self.is_playing:
-                self.stop_song()
-
-            self.current_song = self.music_library[song_idx]
-            self.status_label.config(text=f"Playing: {self.current_song['artist']} - {self.current_song['title']}")
-            self.process = subprocess.Popen(['ffplay', '-nodisp', '-autoexit', self.current_song['path']],
-                                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            self.is_playing = True
-
-        def stop_song(self):
-            if self.process:
-                self.process.terminate()
-                self.is_playing = False
-                self.process = None
-                self.status_label.config(text="Stopped")
-
-        def setup_gui(self):
-            frame = ttk.Frame(self.root)
-            frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-            scrollbar = ttk.Scrollbar(frame, orient=tk.VERTICAL)
-            self.song_listbox = tk.Listbox(frame, height=15, yscrollcommand=scrollbar.set)
-            scrollbar.config(command=self.song_listbox.yview)
-            scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-            self.song_listbox.pack(fill=tk.BOTH, expand=True)
-            self.song_listbox.bind("<Double-1>", lambda e: self.play_song())
-
-            control_frame = ttk.Frame(self.root)
-            control_frame.pack(fill=tk.X, padx=5, pady=5)
-            ttk.Button(control_frame, text="Play", command=self.play_song).pack(side=tk.LEFT, padx=5)
-            ttk.Button(control_frame, text="Stop", command=self.stop_song).pack(side=tk.LEFT, padx=5)
-            ttk.Button(control_frame, text="Browse", command=self.browse_directory).pack(side=tk.LEFT, padx=5)
-
-            self.status_label = ttk.Label(self.root, text="Select a directory to begin")
-            self.status_label.pack(fill=tk.X, padx=5, pady=5)
-
-        def run(self):
-            self.browse_directory()
-            self.root.mainloop()
-
-        def on_closing(self):
-            self.stop_song()
-            self.root.destroy()
-
-    player = MusicPlayer()
-    player.root.protocol("WM_DELETE_WINDOW", player.on_closing)
-    player.run()
+class MusicPlayer(TkPlayer):
+    """Streams the scan into the list, with search, sort orders and a play queue."""
+
+    title = "Purple Future Music Player"
+    theme = PURPLE_THEME
+
+    def __init__(self, scan_mode=SCAN_CACHED, workers=None, backend='auto', watch=False, music_dir=None):
+        # Song changes arrive on the backend's thread; poll_player shows them
+        self.player_events = queue.Queue()
+        # Work other threads hand to the Tk loop, run by poll_player
+        self.ui_calls = queue.Queue()
+        self.watch_changes = watch
+        self.scan_queue = None
+        self.scan_cancel = None
+        self.search_thread = None
+        self.search_after = None
+        self.view = None  # track indexes shown while searching, None for all
+        self.order = None  # track indexes in the chosen sort order, None for scan order
+        super().__init__(music_dir, scan_mode=scan_mode, workers=workers, backend=backend)
+        self.engine.on_song_change = self.player_events.put
+        self.engine.on_library_change = self.on_library_change
+
+    def build_library(self, music_dir):
+        # The scan runs on a worker thread and streams batches of tracks
+        # through a queue; the Tk loop drains it with after() so the
+        # window stays responsive
+        self.cancel_scan()
+        self.engine.set_library(music_dir, TrackTable())
+        self.view = None
+        self.order = None
+        self.search_var.set("")
+        self.song_listbox.reset(0)
+        self.scan_queue = queue.Queue()
+        self.scan_cancel = threading.Event()
+        self.scan_started = time.monotonic()
+        self.scan_count = 0
+        worker = threading.Thread(target=self.scan_worker,
+                                  args=(music_dir, self.scan_queue, self.scan_cancel),
+                                  daemon=True)
+        worker.start()
+        self.root.after(SCAN_POLL_MS, self.drain_scan_queue, self.scan_queue)
+
+    def scan_worker(self, music_dir, scan_queue, cancel):
+        # Runs off the Tk thread: never touch widgets here
+        batch = []
+        scanned = 0
+        last_flush = time.monotonic()
+
+        def flush():
+            nonlocal batch, last_flush
+            scan_queue.put(('tracks', batch, scanned))
+            batch = []
+            last_flush = time.monotonic()
+
+        def on_track(*track):
+            batch.append(track)
+            if len(batch) >= SCAN_BATCH_SIZE or time.monotonic() - last_flush > SCAN_POLL_MS / 1000:
+                flush()
+
+        def on_progress(count):
+            nonlocal scanned
+            scanned = count
+            if time.monotonic() - last_flush > SCAN_POLL_MS / 1000:
+                flush()
+
+        try:
+            self.engine.scan(music_dir, on_track=on_track, on_progress=on_progress,
+                             should_stop=cancel.is_set)
+            flush()
+            scan_queue.put(('done', None, scanned))
+        except ScanCancelled:
+            scan_queue.put(('cancelled', None, scanned))
+        except Exception as e:
+            scan_queue.put(('error', str(e), scanned))
+
+    def drain_scan_queue(self, scan_queue):
+        if scan_queue is not self.scan_queue:
+            return  # a newer scan replaced this one
+        added = False
+        status = None
+        try:
+            # Bounded per tick so a fast scan cannot starve the UI
+            for _ in range(SCAN_MAX_BATCHES_PER_TICK):
+                kind, payload, scanned = scan_queue.get_nowait()
+                self.scan_count = max(self.scan_count, scanned)
+                if kind == 'tracks':
+                    self.engine.music_library.extend(payload)
+                    added = True
+                else:
+                    status = kind, payload
+                    break
+        except queue.Empty:
+            pass
+
+        if added and self.view is None:
+            # Only the visible rows are redrawn, however large the library
+            self.song_listbox.set_row_count(len(self.engine.music_library))
+
+        if status is None:
+            elapsed = max(time.monotonic() - self.scan_started, 1e-6)
+            self.status_label.config(
+                text=f"Scanning... {self.scan_count} files scanned, {len(self.engine.music_library)} "
+                     f"tracks found ({self.scan_count / elapsed:.0f} files/s)")
+            self.root.after(SCAN_POLL_MS, self.drain_scan_queue, scan_queue)
+            return
+
+        kind, payload = status
+        self.scan_queue = None
+        if kind == 'done':
+            self.apply_order()
+            library = self.engine.music_library
+            total = format_duration(library.total_duration())
+            self.status_label.config(text=f"Found {len(library)} songs" + (f" ({total})" if total else ""))
+            if self.watch_changes:
+                self.engine.watch(self.post)
+        elif kind == 'cancelled':
+            self.status_label.config(text=f"Scan cancelled ({len(self.engine.music_library)} songs loaded)")
+        else:
+            self.status_label.config(text=f"Scan failed: {payload}")
+
+    def cancel_scan(self):
+        if self.scan_queue is not None:
+            self.scan_cancel.set()
+
+    def on_search_changed(self, *args):
+        # Debounced so fast typing only runs the last query
+        if self.search_after is not None:
+            self.root.after_cancel(self.search_after)
+        self.search_after = self.root.after(SEARCH_DELAY_MS, self.run_search)
+
+    def run_search(self):
+        self.search_after = None
+        query = self.search_var.get().strip()
+        if not query:
+            self.view = None
+            self.song_listbox.reset(len(self.engine.music_library))
+            return
+        if not self.engine.search_ready():
+            self.build_search_index()
+            return
+        self.view = self.engine.search_library(query)
+        self.song_listbox.reset(len(self.view))
+
+    def build_search_index(self):
+        # Building takes seconds on a big library, so it runs on a thread;
+        # the pending query is re-run once the index is ready
+        if self.search_thread is not None and self.search_thread.is_alive():
+            return
+        library = self.engine.music_library
+        result = {}
+        self.search_thread = threading.Thread(
+            target=lambda: result.setdefault('search', LibrarySearch(library)), daemon=True)
+        self.search_thread.start()
+        self.status_label.config(text="Indexing library for search...")
+
+        def check():
+            if self.search_thread.is_alive():
+                self.root.after(SCAN_POLL_MS, check)
+            elif library is self.engine.music_library:
+                self.engine.search = result.get('search')
+                self.status_label.config(text=f"{len(self.engine.music_library)} songs")
+                self.run_search()
+
+        self.root.after(SCAN_POLL_MS, check)
+
+    def on_sort_changed(self, event=None):
+        name = self.sort_var.get()
+        # A view shown for the first time is sorted on a worker thread
+        if self.engine.set_order(name, self.post, self.order_sorted):
+            self.apply_order()
+        else:
+            self.status_label.config(text=f"Sorting by {name}...")
+
+    def order_sorted(self):
+        self.apply_order()
+        self.status_label.config(text=f"{len(self.engine.music_library)} songs")
+
+    def apply_order(self):
+        # Orders are cached by the engine; a view is only sorted the first
+        # time it is shown, or after the library changed
+        self.order = self.engine.view_order()
+        if self.view is None:
+            self.song_listbox.reset(len(self.engine.music_library))
+
+    def track_at(self, row):
+        if self.view is not None:
+            return self.view[row]
+        # Tracks a running scan adds after the order was taken follow it unsorted
+        if self.order is not None and row < len(self.order):
+            return self.order[row]
+        return row
+
+    def song_label(self, row):
+        idx = self.track_at(row)
+        duration = format_duration(self.engine.music_library.durations[idx])
+        return f"{self.engine.label(idx)}  ({duration})" if duration else self.engine.label(idx)
+
+    def next_song(self):
+        song = self.engine.next()
+        if song is None:
+            self.status_label.config(text="End of queue")
+        else:
+            self.show_playing(song)
+
+    def previous_song(self):
+        song = self.engine.previous()
+        if song is not None:
+            self.show_playing(song)
+
+    def queue_song(self):
+        song_idx = self.selected_song()
+        if song_idx is None:
+            return
+        song = self.engine.enqueue(song_idx)
+        self.status_label.config(text=f"Queued: {song['artist']} - {song['title']} "
+                                      f"({len(self.engine.play_queue)} in queue)")
+
+    def toggle_shuffle(self):
+        self.engine.set_shuffle(self.shuffle_var.get())
+
+    def load_playlist(self):
+        path = filedialog.askopenfilename(title="Load playlist",
+                                          filetypes=[("Playlists", "*.m3u *.m3u8 *.pls"), ("All files", "*")])
+        if not path:
+            return
+        try:
+            count, missing = self.engine.load_playlist(path)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Error", f"Could not load {path}: {e}")
+            return
+        note = f" ({missing} not in library)" if missing else ""
+        self.status_label.config(text=f"Queued {count} songs from {os.path.basename(path)}{note}")
+
+    def save_playlist(self):
+        path = filedialog.asksaveasfilename(title="Save queue", defaultextension=".m3u",
+                                            filetypes=[("M3U playlist", "*.m3u"), ("PLS playlist", "*.pls")])
+        if not path:
+            return
+        try:
+            count = self.engine.save_playlist(path)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Error", f"Could not save {path}: {e}")
+            return
+        self.status_label.config(text=f"Saved {count} songs to {os.path.basename(path)}")
+
+    def on_library_change(self, added, updated, removed):
+        self.order = self.engine.view_order()
+        if self.view is None:
+            self.song_listbox.set_row_count(len(self.engine.music_library))
+            self.song_listbox.refresh()
+        else:
+            self.run_search()  # the results are track indexes, which removals renumber
+        self.status_label.config(text=f"Library updated: {added} added, {updated} changed, "
+                                      f"{removed} removed ({len(self.engine.music_library)} songs)")
+
+    def post(self, callback, *args):
+        # From any thread: runs callback on the Tk thread, at the next poll
+        self.ui_calls.put((callback, args))
+
+    def poll_player(self):
+        try:
+            while True:
+                callback, args = self.ui_calls.get_nowait()
+                callback(*args)
+        except queue.Empty:
+            pass
+        song = False
+        try:
+            while True:
+                song = self.player_events.get_nowait()
+        except queue.Empty:
+            pass
+        if song is None:
+            self.status_label.config(text="Stopped")
+        elif song:
+            self.show_playing(song)
+        self.root.after(PLAYER_POLL_MS, self.poll_player)
+
+    def setup_song_list(self):
+        search_frame = ttk.Frame(self.root)
+        search_frame.pack(fill=tk.X, padx=5, pady=(5, 0))
+        ttk.Label(search_frame, text="Search:").pack(side=tk.LEFT)
+        self.search_var = tk.StringVar()
+        self.search_var.trace_add('write', self.on_search_changed)
+        ttk.Entry(search_frame, textvariable=self.search_var).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        ttk.Label(search_frame, text="Sort:").pack(side=tk.LEFT)
+        self.sort_var = tk.StringVar(value=self.engine.order_name)
+        sort_box = ttk.Combobox(search_frame, textvariable=self.sort_var, values=VIEWS, state='readonly', width=8)
+        sort_box.pack(side=tk.LEFT, padx=5)
+        sort_box.bind("<<ComboboxSelected>>", self.on_sort_changed)
+        super().setup_song_list()
+
+    def control_buttons(self):
+        return super().control_buttons() + [("Cancel scan", self.cancel_scan)]
+
+    def setup_controls(self):
+        super().setup_controls()
+        queue_frame = ttk.Frame(self.root)
+        queue_frame.pack(fill=tk.X, padx=5)
+        ttk.Button(queue_frame, text="Previous", command=self.previous_song).pack(side=tk.LEFT, padx=5)
+        ttk.Button(queue_frame, text="Next", command=self.next_song).pack(side=tk.LEFT, padx=5)
+        ttk.Button(queue_frame, text="Add to queue", command=self.queue_song).pack(side=tk.LEFT, padx=5)
+        self.shuffle_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(queue_frame, text="Shuffle", variable=self.shuffle_var,
+                        command=self.toggle_shuffle).pack(side=tk.LEFT, padx=5)
+        ttk.Button(queue_frame, text="Load playlist", command=self.load_playlist).pack(side=tk.LEFT, padx=5)
+        ttk.Button(queue_frame, text="Save queue", command=self.save_playlist).pack(side=tk.LEFT, padx=5)
+
+    def run(self):
+        self.root.after(PLAYER_POLL_MS, self.poll_player)
+        super().run()
+
+    def on_closing(self):
+        self.cancel_scan()
+        super().on_closing()
+
+
+def run_gui(scan_mode=SCAN_CACHED, workers=None, backend='auto', watch=False, music_dir=None):
+    """Function to run the GUI."""
+    MusicPlayer(scan_mode, workers, backend, watch, music_dir).run()
 
 
 if __name__ == "__main__":
-    # Fork the process to detach the GUI
-    pid = os.fork()
-    if pid > 0:
-        # Parent process exits immediately, freeing the terminal
-        exit(0)
-    else:
-        # Child process runs the GUI
-        # Detach from terminal
-        os.setsid()  # Create new session
-        run_gui()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Purple Future Music Player")
+    add_scan_arguments(parser)
+    add_playback_arguments(parser)
+    args = parser.parse_args()
+    use_locale_collation()
+
+    detach_from_terminal()
+    run_gui(args.scan_mode, args.workers, args.backend, args.watch, args.music_dir)
\ No newline at end of file
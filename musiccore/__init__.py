@@ -0,0 +1,29 @@
+"""The library, scanning, index and playback code shared by every player.
+
+The musicplayer*.py and guimusicplayer*.py scripts are front-ends over
+this package. A front-end creates a PlayerEngine, picks a directory,
+calls build_library() (or scan() / set_library() to load on a thread),
+and then only decides how to show songs and results.
+
+- engine: PlayerEngine: library, search, play queue and backend together
+- library_scanner, track_metadata, library_index: the walk, tag reading
+  and the persistent SQLite index behind load_library()
+- header_tags: reads common MP3 / FLAC / Ogg / WAV headers without
+  mutagen's full parse, skipping cover art
+- library_watch: inotify (or polling) watcher behind PlayerEngine.watch()
+- track_table, library_search: the in-memory library and its search
+- library_views: cached sorted orders (artist/album, title, path, added)
+- playback, play_queue, playlists: mpv/ffplay backends, the queue, M3U/PLS
+- artwork, artwork_cache, artwork_render, kitty_graphics: cover art
+- kitty_player: TerminalPlayer base drawing covers from a worker thread
+- terminal, library_pager, tui_loop: the shared terminal front-end
+- dir_browser: cached directory listings and type-ahead for both pickers
+- tk_browser, virtual_list, tk_player: Tk widgets and the window the
+  guimusicplayer*.py scripts build on; the only modules that import tkinter
+"""
+
+from .engine import PlayerEngine
+from .library_index import (add_scan_arguments, load_library, LibraryIndex, ScanCancelled,
+                            SCAN_CACHED, SCAN_RESCAN, SCAN_FULL)
+from .playback import add_playback_arguments, create_backend
+from .track_table import Track, TrackTable
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+
+import base64
+
+
+def extract_artwork(song_path):
+    """Return the first embedded picture of song_path as bytes, or None.
+
+    The library only keeps a song's path, so the file is re-opened here
+    when its artwork is actually needed.
+    """
+    from mutagen import File
+    audio = File(song_path)
+    if audio is None:
+        return None
+
+    # FLAC keeps pictures in their own metadata blocks
+    pictures = getattr(audio, 'pictures', None)
+    if pictures:
+        return pictures[0].data
+
+    tags = audio.tags
+    if tags is None:
+        return None
+
+    # ID3 (MP3, WAV)
+    if hasattr(tags, 'getall'):
+        frames = tags.getall('APIC')
+        return frames[0].data if frames else None
+
+    # Vorbis comments (OGG) carry a base64 encoded FLAC picture block
+    blocks = tags.get('metadata_block_picture')
+    if blocks:
+        from mutagen.flac import Picture
+        return Picture(base64.b64decode(blocks[0])).data
+    return None
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+
+import hashlib
+import os
+import tempfile
+
+from .artwork_render import decode_for_edge, encode_png, fit
+
+# Longest edge, in pixels, of each pre-rendered thumbnail
+THUMBNAIL_SIZES = (128, 256, 512)
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+# Eviction deletes files until the cache is back under this share of the limit
+EVICT_TO = 0.8
+
+
+def default_cache_dir():
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+    return os.path.join(cache_home, 'musicplayer', 'artwork')
+
+
+def artwork_key(artwork):
+    return hashlib.blake2b(artwork, digest_size=16).hexdigest()
+
+
+class ArtworkCache:
+    """PNG thumbnails of embedded cover art, shared across tracks.
+
+    Files are named after a hash of the embedded picture bytes, so tracks
+    with the same cover share thumbnails and a changed cover simply gets
+    new ones; nothing has to be invalidated. The first request for a
+    picture renders every size in `sizes` from a single decode. After
+    that, any size is a file read with no PIL work. Thumbnails are written
+    under a temporary name and renamed into place, so readers never see
+    half a file. Past max_bytes the least recently used files (by mtime,
+    which every hit refreshes) are deleted.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=CACHE_MAX_BYTES, sizes=THUMBNAIL_SIZES):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.sizes = tuple(sorted(sizes))
+        self._total = None  # bytes on disk, counted on the first write
+
+    def fit_size(self, size):
+        """Smallest pre-rendered size covering `size` pixels, else the largest."""
+        for candidate in self.sizes:
+            if candidate >= size:
+                return candidate
+        return self.sizes[-1]
+
+    def _path(self, key, size):
+        return os.path.join(self.cache_dir, key[:2], f"{key}-{size}.png")
+
+    def thumbnail(self, artwork, size):
+        """Return PNG bytes of artwork scaled to fit within size x size pixels."""
+        size = self.fit_size(size)
+        key = artwork_key(artwork)
+        path = self._path(key, size)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)
+            return data
+        except FileNotFoundError:
+            pass
+
+        rendered = self._render(artwork)
+        try:
+            self._store(key, rendered)
+        except OSError as e:
+            print(f"Could not cache artwork: {e}")
+        return rendered[size]
+
+    def thumbnail_path(self, artwork, size):
+        """Like thumbnail(), but return (path, None) with the cached file's path.
+
+        When the cache cannot be written it returns (None, PNG bytes)
+        instead, so the picture is still only rendered once.
+        """
+        size = self.fit_size(size)
+        key = artwork_key(artwork)
+        path = self._path(key, size)
+        try:
+            os.utime(path)
+            return path, None
+        except FileNotFoundError:
+            pass
+        rendered = self._render(artwork)
+        try:
+            self._store(key, rendered)
+        except OSError as e:
+            print(f"Could not cache artwork: {e}")
+            return None, rendered[size]
+        return path, None
+
+    def _render(self, artwork):
+        # One reduced decode for the largest size; each smaller size is
+        # scaled down from the one before it and encoded once
+        img = decode_for_edge(artwork, self.sizes[-1])
+        rendered = {}
+        for size in reversed(self.sizes):
+            img = fit(img, size)
+            rendered[size] = encode_png(img)
+        return rendered
+
+    def _store(self, key, rendered):
+        directory = os.path.join(self.cache_dir, key[:2])
+        os.makedirs(directory, exist_ok=True)
+        if self._total is None:
+            self._total = sum(size for _, size, _ in self._entries())
+        for size, data in rendered.items():
+            path = self._path(key, size)
+            try:
+                # Replaced below, e.g. after another player rendered it first
+                replaced = os.stat(path).st_size
+            except FileNotFoundError:
+                replaced = 0
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            self._total += len(data) - replaced
+        if self._total > self.max_bytes:
+            self._evict()
+
+    def _entries(self):
+        # (mtime, size, path) of every thumbnail in the cache
+        try:
+            subdirs = [entry.path for entry in os.scandir(self.cache_dir) if entry.is_dir()]
+        except FileNotFoundError:
+            return []
+        entries = []
+        for subdir in subdirs:
+            for entry in os.scandir(subdir):
+                if entry.name.endswith('.png'):
+                    st = entry.stat()
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+        return entries
+
+    def _evict(self):
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * EVICT_TO
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass  # another player evicted it first
+            total -= size
+        self._total = total
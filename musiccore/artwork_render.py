@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+
+import io
+import struct
+import sys
+
+# Cell size assumed when the terminal does not report its pixel size
+DEFAULT_CELL_SIZE = (10, 20)
+# Decoding keeps this much more resolution than the target, so the final
+# LANCZOS pass still has detail to work with
+DECODE_HEADROOM = 2
+# zlib level for thumbnails: 3 is several times faster than Pillow's
+# default 6 and costs about a tenth more bytes
+PNG_COMPRESS_LEVEL = 3
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+def terminal_cell_size(stream=None):
+    """Return the (width, height) of one terminal cell in pixels."""
+    stream = stream or sys.stdout
+    try:
+        import fcntl
+        import termios
+        packed = fcntl.ioctl(stream.fileno(), termios.TIOCGWINSZ, b'\0' * 8)
+        rows, cols, width, height = struct.unpack('HHHH', packed)
+    except (ImportError, OSError, ValueError):
+        return DEFAULT_CELL_SIZE
+    if not (rows and cols and width and height):
+        return DEFAULT_CELL_SIZE
+    return width // cols, height // rows
+
+
+def target_edge(columns, rows=None, cell_size=None):
+    """Pixel edge of a square picture spanning `columns` cells (and at most `rows`)."""
+    cell_width, cell_height = cell_size or terminal_cell_size()
+    edge = columns * cell_width
+    if rows is not None:
+        edge = min(edge, rows * cell_height)
+    return edge
+
+
+def decode_for_edge(artwork, edge):
+    """Decode artwork at no more than about DECODE_HEADROOM times `edge`.
+
+    For JPEG, draft() asks the decoder itself to scale by 1/2, 1/4 or 1/8
+    while decoding, so a 3000 px cover is never decoded at full size.
+    reduce() then box-shrinks by a whole factor, which is much cheaper than
+    a LANCZOS pass over the full image.
+    """
+    # Pillow is only loaded once a picture is actually rendered
+    from PIL import Image
+    img = Image.open(io.BytesIO(artwork))
+    wanted = edge * DECODE_HEADROOM
+    img.draft(None, (wanted, wanted))
+    factor = min(img.size) // wanted
+    if factor > 1:
+        img = img.reduce(factor)
+    return _rgb(img)
+
+
+def _rgb(img):
+    if img.mode not in ('RGB', 'RGBA'):
+        img = img.convert('RGBA' if 'transparency' in img.info or img.mode in ('LA', 'PA') else 'RGB')
+    return img
+
+
+def fit(img, edge):
+    """Scale img down, keeping its shape, so neither side exceeds edge."""
+    if max(img.size) <= edge:
+        return img
+    from PIL import Image
+    scale = edge / max(img.size)
+    size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+    return img.resize(size, Image.Resampling.LANCZOS)
+
+
+def encode_png(img, max_bytes=None):
+    """Encode img as PNG once; only if that overshoots max_bytes, binary
+    search the largest edge that fits."""
+    data = _png(img)
+    if max_bytes is None or len(data) <= max_bytes:
+        return data
+    lo, hi = 1, max(img.size) - 1
+    best = _png(fit(img, 1))
+    while lo <= hi:
+        edge = (lo + hi) // 2
+        candidate = _png(fit(img, edge))
+        if len(candidate) <= max_bytes:
+            best, lo = candidate, edge + 1
+        else:
+            hi = edge - 1
+    return best
+
+
+def _png(img):
+    output = io.BytesIO()
+    img.save(output, format='PNG', compress_level=PNG_COMPRESS_LEVEL)
+    return output.getvalue()
+
+
+def to_png(artwork):
+    """artwork as PNG at its own size: PNG pictures as they are, anything else
+    (usually JPEG) decoded and encoded once."""
+    if artwork.startswith(PNG_SIGNATURE):
+        return artwork
+    from PIL import Image
+    return _png(_rgb(Image.open(io.BytesIO(artwork))))
+
+
+def render_artwork(artwork, edge, max_bytes=None):
+    """PNG of artwork fitting an edge x edge box: one decode, one resize, one encode."""
+    return encode_png(fit(decode_for_edge(artwork, edge), edge), max_bytes)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+
+import os
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+
+# Listings kept in memory; each is only a list of names
+LISTING_CACHE_SIZE = 256
+# A listing taken this soon after the directory changed is not trusted:
+# coarse mtimes (FAT, some network mounts) could hide a second change
+MTIME_SLACK_SECONDS = 2.0
+
+
+def default_state_path():
+    state_home = os.environ.get('XDG_STATE_HOME') or os.path.expanduser('~/.local/state')
+    return os.path.join(state_home, 'musicplayer', 'last_music_dir')
+
+
+class DirectoryBrowser:
+    """Subdirectory listings for the directory pickers.
+
+    os.scandir reports each entry's type from the directory itself
+    (d_type), so telling directories from files costs no stat per entry;
+    only symlinks and file systems without d_type are stat'ed. Listings
+    are cached per directory and reused while the directory's mtime, one
+    stat, is unchanged, so going back up or down a tree does not list it
+    again. matching() answers type-ahead with a binary search over the
+    casefolded names, and the directory chosen last is remembered as the
+    next starting point.
+    """
+
+    def __init__(self, state_path=None, cache_size=LISTING_CACHE_SIZE):
+        self.state_path = state_path or default_state_path()
+        self.cache_size = cache_size
+        self._listings = OrderedDict()  # path -> (mtime_ns, listed_at, names, folded)
+
+    def start_dir(self, configured=None):
+        """The configured directory, else the last one chosen, else home."""
+        for candidate in (configured, self._last_used()):
+            if candidate:
+                candidate = os.path.abspath(os.path.expanduser(candidate))
+                if os.path.isdir(candidate):
+                    return candidate
+        return os.path.expanduser('~')
+
+    def remember(self, path):
+        try:
+            os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+            with open(self.state_path, 'w', encoding='utf-8') as f:
+                f.write(os.path.abspath(path))
+        except OSError as e:
+            print(f"Could not remember {path}: {e}")
+
+    def _last_used(self):
+        try:
+            with open(self.state_path, encoding='utf-8') as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
+    def subdirs(self, path):
+        """Sorted names of the directories in path (OSError if unreadable)."""
+        return self._listing(path)[0]
+
+    def matching(self, path, prefix):
+        """Indexes into subdirs(path) of the names starting with prefix, ignoring case."""
+        names, folded = self._listing(path)
+        prefix = prefix.casefold()
+        start = bisect_left(folded, (prefix,))
+        matches = []
+        for name, idx in folded[start:]:
+            if not name.startswith(prefix):
+                break
+            matches.append(idx)
+        return sorted(matches)
+
+    def resolve(self, path, text):
+        """Directory that typed text points to from path: absolute, ~, or relative."""
+        target = os.path.normpath(os.path.join(path, os.path.expanduser(text)))
+        return target if os.path.isdir(target) else None
+
+    def _listing(self, path):
+        mtime_ns = os.stat(path).st_mtime_ns
+        cached = self._listings.get(path)
+        if cached is not None and cached[0] == mtime_ns and cached[1] - mtime_ns / 1e9 > MTIME_SLACK_SECONDS:
+            self._listings.move_to_end(path)
+            return cached[2], cached[3]
+
+        listed_at = time.time()
+        names = []
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir():
+                        names.append(entry.name)
+                except OSError:
+                    continue  # a dangling or unreadable link
+        names.sort()
+        folded = sorted((name.casefold(), idx) for idx, name in enumerate(names))
+        self._listings[path] = (mtime_ns, listed_at, names, folded)
+        self._listings.move_to_end(path)
+        if len(self._listings) > self.cache_size:
+            self._listings.popitem(last=False)
+        return names, folded
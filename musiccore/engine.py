@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+
+import itertools
+import threading
+
+from .library_index import load_library, LibraryIndex, SCAN_CACHED
+from .library_search import LibrarySearch, SEARCH_RESULT_LIMIT
+from .library_views import LibraryViews, VIEW_LIBRARY, VIEWS
+from .play_queue import PlayQueue
+from .playback import create_backend
+from .playlists import iter_playlist, write_playlist
+from .track_table import path_track_id, TrackTable
+
+
+class PlayerEngine:
+    """Library, search, play queue and playback behind one object.
+
+    This is everything a player does apart from drawing it: the terminal
+    and Tk front-ends call these methods and only decide how to show the
+    outcome. Methods report through return values (None for a song index
+    not in the library) and let OSError / ValueError from playlist files
+    through, so each front-end words its own messages.
+
+    Front-ends name songs by track index, their position in music_library.
+    The play queue keeps track IDs instead (TrackTable.ids), which do not
+    change when the library gains or loses rows.
+
+    Playback events arrive on the backend's thread (or the event loop for
+    the asyncio ffplay backend). The engine updates current_song and the
+    queue there and then calls on_song_change(song), with None once
+    playback has ended; front-ends hand that on to their UI thread.
+
+    watch() keeps the library in step with the music directory: the
+    watcher's thread updates the index, the front-end's post() runs
+    apply_changes() on the UI thread, and that calls
+    on_library_change(added, updated, removed).
+
+    set_order() picks the view (see library_views) the front-end lists
+    the library in; with nothing queued, playback carries on in that order.
+    A view sorted for the first time is sorted on a worker thread and
+    switched to through post(), like the watcher's updates.
+    """
+
+    def __init__(self, scan_mode=SCAN_CACHED, workers=None, backend='auto', asynchronous=False):
+        self.scan_mode = scan_mode
+        self.workers = workers
+        self.music_dir = None
+        self.music_library = TrackTable()
+        self.search = None
+        self.order_name = VIEW_LIBRARY
+        self.views = None
+        self.sorting = None  # view being sorted off the front-end's thread
+        self.current_song = None
+        self.play_queue = PlayQueue()
+        self.queued_id = None  # song handed to the backend to play after the current one
+        self.on_song_change = None
+        self.on_library_change = None
+        self.watcher = None
+        self.backend = create_backend(backend, asynchronous=asynchronous)
+        self.backend.next_track = self.next_track
+        self.backend.on_track_change = self.on_track_change
+
+    # Library
+
+    def scan(self, music_dir, on_track=None, on_progress=None, should_stop=None):
+        """Return the TrackTable for music_dir without making it the library.
+
+        For front-ends that scan on a worker thread; the callbacks are
+        those of load_library.
+        """
+        # Tags come from the persistent index; mutagen only sees new or changed files
+        return load_library(music_dir, self.scan_mode, workers=self.workers, on_track=on_track,
+                            on_progress=on_progress, should_stop=should_stop)
+
+    def set_library(self, music_dir, library):
+        self.stop_watching()
+        self.music_dir = music_dir
+        self.music_library = library
+        self.search = None
+        # The queued songs belong to the old directory
+        shuffle = self.play_queue.shuffle
+        self.play_queue = PlayQueue()
+        self.play_queue.set_shuffle(shuffle)
+        self.queued_id = None
+        self.backend.refresh_next()
+
+    def build_library(self, music_dir):
+        self.set_library(music_dir, self.scan(music_dir))
+        return self.music_library
+
+    def watch(self, post, **options):
+        """Follow changes under music_dir until stop_watching() or close().
+
+        post(callback, *args) must run callback on the front-end's thread;
+        options go to LibraryWatcher. Returns 'inotify' or 'poll'.
+        """
+        from .library_watch import LibraryWatcher
+        self.stop_watching()
+        music_dir = self.music_dir
+
+        def on_batch(paths):
+            # Watcher thread: SQLite connections stay on the thread that made them
+            index = LibraryIndex()
+            try:
+                changed, removed = index.update_paths(music_dir, paths, workers=self.workers)
+            finally:
+                index.close()
+            if changed or removed:
+                post(self.apply_changes, music_dir, changed, removed)
+
+        self.watcher = LibraryWatcher(music_dir, on_batch, **options)
+        self.watcher.start()
+        return self.watcher.method
+
+    def stop_watching(self):
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+
+    def apply_changes(self, music_dir, changed, removed):
+        """Merge one batch from LibraryIndex.update_paths into the library.
+
+        New tracks are appended and retagged ones updated in place, so
+        existing indexes stay valid; only removals renumber the rows after
+        them. The play queue holds track IDs, so it just loses the songs
+        that were removed.
+        """
+        if music_dir != self.music_dir:
+            return  # a different directory has been loaded since
+        library = self.music_library
+        added = updated = 0
+        for path, *tags in changed:
+            idx = library.find(path)
+            if idx is None:
+                library.append(path, *tags)
+                added += 1
+            else:
+                library.set(idx, *tags)
+                updated += 1
+        gone = {idx for idx in map(library.find, removed) if idx is not None}
+        if gone:
+            gone_ids = {library.ids[idx] for idx in gone}
+            self.music_library = library.without(gone)
+            if self.views is not None and self.views.library is library:
+                self.views = self.views.without(gone, self.music_library)
+            self.play_queue.discard(gone_ids)
+            if self.queued_id in gone_ids:
+                self.queued_id = None
+            self.backend.refresh_next()
+        self.search = None
+        if self.on_library_change is not None:
+            self.on_library_change(added, updated, len(gone))
+
+    def search_ready(self):
+        # The Tk player keeps adding tracks while a scan runs
+        return self.search is not None and len(self.search.labels) == len(self.music_library)
+
+    def search_library(self, query, limit=SEARCH_RESULT_LIMIT):
+        """Return matching track indexes, building the search index on first use."""
+        if not self.search_ready():
+            self.search = LibrarySearch(self.music_library)
+        return self.search.search(query, limit=limit)
+
+    def set_order(self, name, post=None, on_ready=None):
+        """Show and play the library in view name.
+
+        Returns True once the view is in use. Sorting a view for the first
+        time takes seconds on a big library, so given post (as for watch())
+        that sort runs on a worker thread instead: set_order() returns
+        False, the current view stays until the sort is done, and then the
+        engine switches on the front-end's thread and calls on_ready().
+        Asking for another view meanwhile supersedes the pending one.
+        """
+        if name not in VIEWS:
+            raise ValueError(f"Unknown view: {name}")
+        views = self._views()
+        if post is None or views.ready(name):
+            self.sorting = None
+            self.order_name = name
+            self.backend.refresh_next()
+            return True
+        if self.sorting != name:
+            self.sorting = name
+            threading.Thread(target=self._sort_view, args=(views, name, post, on_ready), daemon=True).start()
+        return False
+
+    def _sort_view(self, views, name, post, on_ready):
+        # Worker thread: order() caches the permutation in views
+        views.order(name)
+        post(self._view_sorted, name, post, on_ready)
+
+    def _view_sorted(self, name, post, on_ready):
+        if self.sorting != name:
+            return  # another view was asked for since
+        self.sorting = None
+        # Sorts again if rows were removed meanwhile, which replaces the views
+        if self.set_order(name, post, on_ready) and on_ready is not None:
+            on_ready()
+
+    def view_order(self):
+        """Track indexes in the current view's order, or None for scan order."""
+        if self.order_name == VIEW_LIBRARY:
+            return None
+        return self._views().order(self.order_name)
+
+    def _views(self):
+        # Cached orders belong to one table; removals replace the table
+        views = self.views
+        if views is None or views.library is not self.music_library:
+            views = self.views = LibraryViews(self.music_library)
+        return views
+
+    def label(self, idx):
+        return f"{self.music_library.artist(idx)} - {self.music_library.titles[idx]}"
+
+    # Playback
+
+    def play(self, song_idx):
+        """Play song_idx now and make it the current queue position."""
+        if song_idx not in self.music_library:
+            return None
+        self.play_queue.advance(self.music_library.ids[song_idx])
+        return self.start(song_idx)
+
+    def start(self, song_idx):
+        # Plays without touching the queue; previous() has already moved it
+        if self.backend.is_playing():
+            self.backend.stop()
+        # The backend thread may reset current_song while the old song stops
+        song = self.current_song = self.music_library[song_idx]
+        self.queued_id = None
+        self.backend.play(song['path'])
+        return song
+
+    def stop(self):
+        """Stop playback; returns False if nothing was playing."""
+        if not self.backend.is_playing():
+            return False
+        self.backend.stop()
+        return True
+
+    def is_playing(self):
+        return self.backend.is_playing()
+
+    def close(self):
+        self.stop_watching()
+        self.stop()
+        self.backend.close()
+
+    # Queue
+
+    def following_song(self):
+        # With nothing queued the library plays on in the order it is shown;
+        # returns a track ID, like the queue
+        library = self.music_library
+        current = self.play_queue.current
+        idx = None if current is None else library.row(current)
+        if idx is None:
+            return None
+        views = self._views()
+        position = views.position(self.order_name, idx) + 1
+        if position >= len(library):
+            return None
+        order = views.order(self.order_name)
+        return library.ids[position if order is None else order[position]]
+
+    def next(self):
+        """Play the next song; returns None at the end of the queue."""
+        track_id = self.play_queue.peek(self.following_song())
+        return None if track_id is None else self.play(self.music_library.row(track_id))
+
+    def previous(self):
+        track_id = self.play_queue.back()
+        return None if track_id is None else self.start(self.music_library.row(track_id))
+
+    def enqueue(self, song_idx):
+        if song_idx not in self.music_library:
+            return None
+        self.play_queue.add(self.music_library.ids[song_idx])
+        self.backend.refresh_next()
+        return self.music_library[song_idx]
+
+    @property
+    def shuffle(self):
+        return self.play_queue.shuffle
+
+    def set_shuffle(self, shuffle):
+        self.play_queue.set_shuffle(shuffle)
+        self.backend.refresh_next()
+
+    def load_playlist(self, path):
+        """Queue the library songs listed in an M3U/PLS file.
+
+        Returns (queued, missing), missing being entries not in the library.
+        """
+        missing = 0
+
+        def library_songs():
+            nonlocal missing
+            for song_path in iter_playlist(path):
+                song_idx = self.music_library.find(song_path)
+                if song_idx is None:
+                    missing += 1
+                else:
+                    yield self.music_library.ids[song_idx]
+
+        count = self.play_queue.extend(library_songs())
+        self.backend.refresh_next()
+        return count, missing
+
+    def save_playlist(self, path):
+        """Write the current song and the queue to path; returns the song count."""
+        current = self.play_queue.current
+        songs = self.play_queue if current is None else itertools.chain([current], self.play_queue)
+        library = self.music_library
+        return write_playlist(path, ((library.paths[idx], self.label(idx), library.durations[idx])
+                                     for idx in map(library.row, songs)))
+
+    # Backend hooks
+
+    def next_track(self, path):
+        # Asked by the backend as a song starts, so the following one can be
+        # opened early
+        self.queued_id = self.play_queue.peek(self.following_song())
+        idx = None if self.queued_id is None else self.music_library.row(self.queued_id)
+        return None if idx is None else self.music_library.paths[idx]
+
+    def on_track_change(self, path):
+        # Runs on the backend's thread; path is None once playback has ended
+        track_id = None if path is None else path_track_id(path)
+        if path is None:
+            self.current_song = None
+        elif track_id == self.queued_id:
+            self.queued_id = None
+            self.play_queue.advance(track_id)
+            self.current_song = self.music_library[self.music_library.row(track_id)]
+        elif track_id == self.play_queue.current:
+            self.current_song = self.music_library[self.music_library.row(track_id)]
+        if self.on_song_change is not None:
+            self.on_song_change(self.current_song)
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+
+import os
+import struct
+
+# A wanted tag larger than this is left to mutagen rather than read
+MAX_FIELD_BYTES = 64 * 1024
+# Bytes of a comment read before deciding whether its key is wanted
+VORBIS_KEY_BYTES = 64
+# The last Ogg page is looked for in this much of the end of the file,
+# then in the largest a page can be
+OGG_TAIL_BYTES = 8 * 1024
+OGG_MAX_PAGE_BYTES = 27 + 255 + 255 * 255
+
+# ID3v2 text frames behind mutagen's EasyID3 keys
+ID3_FRAMES = {b'TPE1': 'artist', b'TIT2': 'title', b'TALB': 'album', b'TRCK': 'tracknumber',
+              b'TPOS': 'discnumber', b'TDRC': 'date'}
+ID3_ENCODINGS = ('latin-1', 'utf-16', 'utf-16-be', 'utf-8')
+# Frame format flags meaning the body is not plain text: compressed,
+# encrypted, unsynchronised or grouped
+ID3_V23_FRAME_FLAGS = 0xE0
+ID3_V24_FRAME_FLAGS = 0x4F
+VORBIS_KEYS = frozenset({'artist', 'title', 'album', 'tracknumber', 'discnumber', 'date'})
+
+
+class NotHandled(Exception):
+    """A layout the header reader leaves to mutagen."""
+
+
+class StreamInfo:
+    __slots__ = ('length', 'bitrate', 'sample_rate', 'channels')
+
+    def __init__(self, length=0.0, bitrate=0, sample_rate=0, channels=0):
+        self.length = length
+        self.bitrate = bitrate
+        self.sample_rate = sample_rate
+        self.channels = channels
+
+
+class HeaderTags(dict):
+    """{key: [values]} plus .info, the shape of mutagen.File(path, easy=True)."""
+
+    def __init__(self, info=None):
+        super().__init__()
+        self.info = info
+
+
+def read_header_tags(song_path):
+    """Read tags and stream details from the headers of song_path alone.
+
+    MP3 tags are found by walking the ID3v2 frames and FLAC ones by walking
+    the metadata blocks, seeking over cover art (APIC frames, PICTURE
+    blocks) and everything else that is not wanted; Ogg Vorbis comments are
+    read page by page and the length comes from the last page; WAV needs
+    only its fmt and data chunk headers. So a file with a 5 MB cover costs
+    a few kilobytes of reading instead of the whole tag.
+
+    Returns a HeaderTags, or None for anything unusual (ID3v2.2, an ID3v1
+    tag that would fill gaps, Ogg streams other than Vorbis, damaged
+    headers, ...), which the caller then reads with mutagen.
+    """
+    reader = READERS.get(os.path.splitext(song_path)[1].lower())
+    if reader is None:
+        return None
+    try:
+        # Unbuffered: a read buffer would pull in the cover art being skipped,
+        # since Ogg page headers, for one, sit every few kilobytes inside it
+        with open(song_path, 'rb', buffering=0) as f:
+            return reader(f)
+    except (NotHandled, OSError, ValueError, struct.error):
+        # Read again by mutagen, which reports real errors in its own words
+        return None
+
+
+def _read_exact(f, size):
+    data = f.read(size)
+    if len(data) < size:
+        raise NotHandled("truncated")
+    return data
+
+
+def _syncsafe(data):
+    value = 0
+    for byte in data:
+        value = (value << 7) | (byte & 0x7F)
+    return value
+
+
+def _id3_text(data):
+    if not data or data[0] >= len(ID3_ENCODINGS):
+        raise NotHandled("unknown text encoding")
+    # Several values are separated by nulls; the first is the one shown
+    return data[1:].decode(ID3_ENCODINGS[data[0]]).split('\0')[0]
+
+
+def _read_mp3(f):
+    header = _read_exact(f, 10)
+    major, flags = header[3], header[5]
+    # No ID3v2 at all, ID3v2.2, or an unsynchronised, extended or footed tag
+    if header[:3] != b'ID3' or major not in (3, 4) or flags & 0xD0:
+        raise NotHandled("ID3v2 layout")
+    tag_end = 10 + _syncsafe(header[6:10])
+    frame_flags = ID3_V24_FRAME_FLAGS if major == 4 else ID3_V23_FRAME_FLAGS
+    tags = HeaderTags()
+    year = None
+    pos = 10
+    while pos + 10 <= tag_end:
+        frame = _read_exact(f, 10)
+        if frame[0] == 0:
+            break  # padding
+        size = _syncsafe(frame[4:8]) if major == 4 else int.from_bytes(frame[4:8], 'big')
+        pos += 10 + size
+        if pos > tag_end:
+            raise NotHandled("frame past the end of the tag")
+        key = ID3_FRAMES.get(frame[:4])
+        if key is None and frame[:4] != b'TYER':
+            f.seek(size, os.SEEK_CUR)  # APIC and everything else stays unread
+            continue
+        if frame[9] & frame_flags or size > MAX_FIELD_BYTES:
+            raise NotHandled("frame encoding")
+        text = _id3_text(_read_exact(f, size))
+        if key is None:
+            year = text  # ID3v2.3 year, which mutagen shows as the date
+        else:
+            tags[key] = [text]
+    if year is not None and 'date' not in tags:
+        tags['date'] = [year]
+
+    if len(tags) < len(set(ID3_FRAMES.values())):
+        # mutagen fills the gaps from an ID3v1 tag at the end, if there is one
+        f.seek(-128, os.SEEK_END)
+        if f.read(3) == b'TAG':
+            raise NotHandled("ID3v1 tag")
+    # Frame sync, Xing / VBRI headers and the CBR estimate are mutagen's;
+    # it only reads the first few frames after the tag
+    from mutagen import MutagenError
+    from mutagen.mp3 import MPEGInfo
+    try:
+        tags.info = MPEGInfo(f, tag_end)
+    except MutagenError as e:
+        raise NotHandled(str(e)) from None
+    return tags
+
+
+def _read_vorbis_comments(read, skip, tags):
+    skip(struct.unpack('<I', read(4))[0])  # vendor string
+    for _ in range(struct.unpack('<I', read(4))[0]):
+        length = struct.unpack('<I', read(4))[0]
+        head = read(min(length, VORBIS_KEY_BYTES))
+        key, sep, value = head.partition(b'=')
+        key = key.decode('ascii', 'replace').lower()
+        if not sep or key not in VORBIS_KEYS:
+            skip(length - len(head))  # METADATA_BLOCK_PICTURE and other tags
+            continue
+        if length > MAX_FIELD_BYTES:
+            raise NotHandled("oversized comment")
+        value += read(length - len(head))
+        tags.setdefault(key, []).append(value.decode('utf-8', 'replace'))
+
+
+def _read_flac(f):
+    if _read_exact(f, 4) != b'fLaC':
+        raise NotHandled("no fLaC marker")  # e.g. an ID3 tag in front
+    tags = HeaderTags()
+    seen_comments = False
+    last = False
+    while not last:
+        header = _read_exact(f, 4)
+        last = header[0] & 0x80
+        block_type = header[0] & 0x7F
+        size = int.from_bytes(header[1:4], 'big')
+        block_end = f.tell() + size
+        if block_type == 0:
+            data = _read_exact(f, 18)
+            sample_rate = int.from_bytes(data[10:13], 'big') >> 4
+            if not sample_rate:
+                raise NotHandled("sample rate 0")
+            total_samples = int.from_bytes(data[13:18], 'big') & 0xFFFFFFFFF
+            tags.info = StreamInfo(total_samples / float(sample_rate), 0, sample_rate,
+                                   ((data[12] >> 1) & 7) + 1)
+        elif block_type == 4:
+            if seen_comments:
+                raise NotHandled("second VORBIS_COMMENT block")
+            seen_comments = True
+            _read_vorbis_comments(lambda n: _read_exact(f, n), lambda n: f.seek(n, os.SEEK_CUR), tags)
+        f.seek(block_end)  # PICTURE, SEEKTABLE, PADDING... are never read
+    if tags.info is None:
+        raise NotHandled("no STREAMINFO")
+    if tags.info.length:
+        # Like mutagen: everything after the metadata is audio
+        audio_bytes = os.fstat(f.fileno()).st_size - f.tell()
+        tags.info.bitrate = int(float(audio_bytes) * 8 / tags.info.length)
+    return tags
+
+
+class _OggPages:
+    # The bodies of one stream's pages read back to back; the comment
+    # header's own lengths say where fields end, so packet bounds are ignored
+    def __init__(self, f, serial):
+        self.f = f
+        self.serial = serial
+        self.left = 0
+
+    def _next_page(self):
+        header = _read_exact(self.f, 27)
+        if header[:4] != b'OggS' or struct.unpack('<I', header[14:18])[0] != self.serial:
+            raise NotHandled("interleaved Ogg streams")
+        self.left = sum(_read_exact(self.f, header[26]))
+
+    def read(self, size):
+        chunks = []
+        while size:
+            while not self.left:
+                self._next_page()
+            data = _read_exact(self.f, min(size, self.left))
+            self.left -= len(data)
+            size -= len(data)
+            chunks.append(data)
+        return b''.join(chunks)
+
+    def skip(self, size):
+        while size:
+            while not self.left:
+                self._next_page()
+            step = min(size, self.left)
+            self.f.seek(step, os.SEEK_CUR)
+            self.left -= step
+            size -= step
+
+
+def _last_granule(f, serial):
+    file_size = os.fstat(f.fileno()).st_size
+    for tail in (OGG_TAIL_BYTES, OGG_MAX_PAGE_BYTES):
+        start = max(0, file_size - tail)
+        f.seek(start)
+        data = f.read(file_size - start)
+        at = data.rfind(b'OggS')
+        while at != -1:
+            if len(data) - at >= 27 and struct.unpack_from('<I', data, at + 14)[0] == serial:
+                granule = struct.unpack_from('<q', data, at + 6)[0]
+                if granule >= 0:  # -1: no packet ends on this page
+                    return granule
+            at = data.rfind(b'OggS', 0, at)
+        if start == 0:
+            break
+    raise NotHandled("no final Ogg page")
+
+
+def _read_ogg(f):
+    header = _read_exact(f, 27)
+    if header[:4] != b'OggS' or not header[5] & 0x02:
+        raise NotHandled("not the start of an Ogg stream")
+    serial = struct.unpack('<I', header[14:18])[0]
+    packet = _read_exact(f, sum(_read_exact(f, header[26])))
+    if not packet.startswith(b'\x01vorbis') or len(packet) < 28:
+        raise NotHandled("not Ogg Vorbis")  # Opus, FLAC-in-Ogg, ...
+    channels, sample_rate, *rates = struct.unpack('<BI3i', packet[11:28])
+    if not sample_rate:
+        raise NotHandled("sample rate 0")
+    # The same choice mutagen makes among the three advertised rates
+    max_bitrate, nominal_bitrate, min_bitrate = (max(0, rate) for rate in rates)
+    if nominal_bitrate == 0:
+        bitrate = (max_bitrate + min_bitrate) // 2
+    elif max_bitrate and max_bitrate < nominal_bitrate:
+        bitrate = max_bitrate
+    elif min_bitrate > nominal_bitrate:
+        bitrate = min_bitrate
+    else:
+        bitrate = nominal_bitrate
+
+    tags = HeaderTags()
+    pages = _OggPages(f, serial)
+    if pages.read(7) != b'\x03vorbis':
+        raise NotHandled("no comment header")
+    _read_vorbis_comments(pages.read, pages.skip, tags)
+    tags.info = StreamInfo(_last_granule(f, serial) / float(sample_rate), bitrate, sample_rate, channels)
+    return tags
+
+
+def _read_wav(f):
+    header = _read_exact(f, 12)
+    if header[:4] != b'RIFF' or header[8:12] != b'WAVE':
+        raise NotHandled("not RIFF/WAVE")
+    fmt = data_size = None
+    while fmt is None or data_size is None:
+        chunk = f.read(8)
+        if len(chunk) < 8:
+            break
+        chunk_id, size = chunk[:4], struct.unpack('<I', chunk[4:])[0]
+        if chunk_id == b'fmt ':
+            fmt = f.read(size)
+            f.seek(size & 1, os.SEEK_CUR)
+        else:
+            if chunk_id == b'data':
+                data_size = size
+            f.seek(size + (size & 1), os.SEEK_CUR)  # chunks are padded to an even size
+    if fmt is None or len(fmt) < 16:
+        raise NotHandled("no fmt chunk")
+    _, channels, sample_rate, _, block_align, bits_per_sample = struct.unpack('<HHLLHH', fmt[:16])
+    samples = data_size / block_align if data_size and block_align else 0
+    # No tags: mutagen's easy interface does not map the WAV ID3 chunk either
+    return HeaderTags(StreamInfo(samples / sample_rate if sample_rate else 0.0,
+                                 channels * bits_per_sample * sample_rate, sample_rate, channels))
+
+
+READERS = {'.mp3': _read_mp3, '.flac': _read_flac, '.ogg': _read_ogg, '.wav': _read_wav}
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+
+import base64
+import hashlib
+import os
+import sys
+
+# Largest base64 payload the protocol allows in one escape
+CHUNK_SIZE = 4096
+MEDIUMS = ('auto', 'direct', 'file', 'shm')
+
+
+def is_local_session():
+    """False over SSH, where the terminal cannot see our files or shared memory."""
+    return not (os.environ.get('SSH_CONNECTION') or os.environ.get('SSH_TTY'))
+
+
+class KittyGraphics:
+    """Shows PNG images with the Kitty terminal graphics protocol.
+
+    Each image gets a stable id hashed from its whole key (for thumbnails,
+    a hash of the artwork plus the size), so an image sent once this session is shown
+    again with a placement command (a=p) instead of being retransmitted.
+    New images travel by one of three mediums:
+    - file (t=f): the terminal reads the cached thumbnail file itself;
+    - shm (t=s): the bytes go through a POSIX shared memory object;
+    - direct: base64 in the escape itself, split into 4096-byte chunks
+      (m=1) so the terminal can process it piece by piece.
+    'auto' uses file/shm locally and direct over SSH. q=2 keeps the
+    terminal's replies out of the player's input.
+    """
+
+    def __init__(self, out=None, medium='auto'):
+        self.out = out or sys.stdout
+        if medium == 'auto':
+            medium = 'file' if is_local_session() else 'direct'
+        self.medium = medium
+        self.uploaded = set()
+
+    @staticmethod
+    def image_id(key):
+        # Ids are 32-bit and 0 means "no id"
+        return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=4).digest(), 'big') or 1
+
+    def is_uploaded(self, key):
+        return self.image_id(key) in self.uploaded
+
+    def place(self, key, columns=None, rows=None):
+        """Show an image that was already transmitted, at the cursor."""
+        self._write(f"a=p,i={self.image_id(key)},q=2{self._cells(columns, rows)}")
+        self.out.flush()
+
+    def transmit(self, key, data=None, path=None, columns=None, rows=None):
+        """Send a PNG (bytes, or a file at path) and show it at the cursor."""
+        image_id = self.image_id(key)
+        control = f"a=T,f=100,i={image_id},q=2{self._cells(columns, rows)}"
+        if self.medium == 'file' and path:
+            self._write(f"{control},t=f", base64.b64encode(os.fsencode(path)).decode('ascii'))
+        else:
+            if data is None:
+                with open(path, 'rb') as f:
+                    data = f.read()
+            name = None
+            if self.medium in ('file', 'shm'):
+                try:
+                    name = self._to_shared_memory(data)
+                except OSError:
+                    pass  # no /dev/shm; send the bytes inline instead
+            if name:
+                self._write(f"{control},t=s,S={len(data)}", base64.b64encode(name.encode()).decode('ascii'))
+            else:
+                self._write_chunked(control, data)
+        self.out.flush()
+        self.uploaded.add(image_id)
+
+    @staticmethod
+    def _cells(columns, rows):
+        # Scale the image to this many terminal cells
+        return (f",c={columns}" if columns else "") + (f",r={rows}" if rows else "")
+
+    def _write(self, control, payload=""):
+        self.out.write(f"\033_G{control};{payload}\033\\" if payload else f"\033_G{control}\033\\")
+
+    def _write_chunked(self, control, data):
+        encoded = base64.b64encode(data).decode('ascii')
+        for offset in range(0, len(encoded), CHUNK_SIZE):
+            more = 1 if offset + CHUNK_SIZE < len(encoded) else 0
+            # Only the first chunk carries the image keys
+            keys = f"{control},m={more}" if offset == 0 else f"m={more}"
+            self._write(keys, encoded[offset:offset + CHUNK_SIZE])
+
+    @staticmethod
+    def _to_shared_memory(data):
+        from multiprocessing import resource_tracker, shared_memory
+        shm = shared_memory.SharedMemory(create=True, size=len(data))
+        shm.buf[:len(data)] = data
+        # The terminal unlinks the object once it has read it, so Python
+        # must not remove it at exit
+        resource_tracker.unregister(shm._name, 'shared_memory')
+        shm.close()
+        return shm.name
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .kitty_graphics import KittyGraphics
+from .terminal import TerminalPlayer
+
+
+class KittyArtworkPlayer(TerminalPlayer):
+    """TerminalPlayer drawing prepare_artwork()'s result for each song.
+
+    Reading the picture and turning it into PNG happens on one worker
+    thread; only the finished image is written, above the prompt, on the
+    event loop. Subclasses override prepare_artwork(song_path, cancelled),
+    which runs on the worker and returns (key, data, path), or None for no
+    picture; data is PNG bytes, path a PNG file, and both are None when the
+    key is already uploaded.
+    """
+
+    # Width of the drawn cover in terminal cells; None leaves Kitty's default
+    artwork_columns = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.kitty = KittyGraphics()
+        # One worker: a newer song's artwork waits instead of racing an old one
+        self.artwork_worker = ThreadPoolExecutor(max_workers=1)
+        self.artwork_job = None
+        self.artwork_cancelled = None
+
+    def prepare_artwork(self, song_path, cancelled):
+        return None  # no cover unless a subclass finds one
+
+    def display_artwork(self, song):
+        # Called once the song is already playing: the picture is prepared
+        # on the worker and drawn by show_artwork on the event loop
+        self.cancel_artwork()
+        cancelled = self.artwork_cancelled = threading.Event()
+        self.artwork_job = self.artwork_worker.submit(self.prepare_artwork, song['path'], cancelled)
+        self.artwork_job.add_done_callback(lambda job: self.ui.post(self.show_artwork, job, cancelled))
+
+    def cancel_artwork(self):
+        if self.artwork_job is not None:
+            self.artwork_cancelled.set()
+            self.artwork_job.cancel()
+            self.artwork_job = None
+
+    def show_artwork(self, job, cancelled):
+        if cancelled.is_set() or job.cancelled():
+            return  # the user moved on to another song
+        try:
+            result = job.result()
+        except Exception as e:
+            self.ui.notify(f"Failed to display artwork: {e}")
+            return
+        if result is None:
+            return
+        key, data, path = result
+        columns = self.artwork_columns
+        if self.kitty.is_uploaded(key):
+            self.ui.above_prompt(lambda: self.kitty.place(key, columns=columns))
+        else:
+            self.ui.above_prompt(lambda: self.kitty.transmit(key, data=data, path=path, columns=columns))
+
+    def close(self):
+        super().close()
+        self.artwork_worker.shutdown(wait=False, cancel_futures=True)
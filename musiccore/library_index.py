@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+
+import os
+import sqlite3
+import stat
+import time
+from collections import deque
+
+from .library_scanner import SUPPORTED_FORMATS, iter_audio_entries
+from .track_metadata import read_metadata_many
+from .track_table import path_track_id, TrackTable, TRACK_FIELDS
+
+# Scan modes used by the front-ends' --rescan / --full-rescan switches
+SCAN_CACHED = 'cached'   # load the index, only scan a directory never seen before
+SCAN_RESCAN = 'rescan'   # walk the tree, re-read tags of new or changed files only
+SCAN_FULL = 'full'       # walk the tree and re-read every file
+
+# Bumped whenever tracks gains columns; older index files are migrated on open
+SCHEMA_VERSION = 4
+# Rows load() reads from SQLite and adds to the TrackTable at a time
+LOAD_BATCH_SIZE = 5000
+# Paths looked up per "path IN (...)" query; SQLite allows 999 parameters before 3.32
+PATH_QUERY_BATCH = 900
+# Columns tracks has gained, with their SQL types: stream details and numeric
+# tags in version 2, the time each file was first indexed in version 3, the
+# track ID in version 4
+MIGRATED_COLUMNS = (('duration', 'REAL'), ('bitrate', 'INTEGER'), ('sample_rate', 'INTEGER'),
+                    ('channels', 'INTEGER'), ('track_number', 'INTEGER'), ('disc_number', 'INTEGER'),
+                    ('year', 'INTEGER'), ('added', 'REAL'), ('track_id', 'INTEGER'))
+# Of those, the columns the index fills in itself rather than from the file
+OWN_COLUMNS = ('added', 'track_id')
+# Every TrackTable field but the path, as stored in and read from tracks
+TAG_COLUMNS = ", ".join(TRACK_FIELDS[1:])
+INSERT_TRACK = (f"INSERT OR REPLACE INTO tracks (root, path, seq, size, mtime_ns, valid, {TAG_COLUMNS}) "
+                f"VALUES ({', '.join('?' * (5 + len(TRACK_FIELDS)))})")
+NO_TAGS = (None,) * (len(TRACK_FIELDS) - 1 - len(OWN_COLUMNS))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS roots (
+    root TEXT PRIMARY KEY,
+    scanned_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tracks (
+    root TEXT NOT NULL,
+    path TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    valid INTEGER NOT NULL,
+    artist TEXT,
+    title TEXT,
+    album TEXT,
+    duration REAL,
+    bitrate INTEGER,
+    sample_rate INTEGER,
+    channels INTEGER,
+    track_number INTEGER,
+    disc_number INTEGER,
+    year INTEGER,
+    added REAL,
+    track_id INTEGER,
+    PRIMARY KEY (root, path)
+);
+"""
+
+
+class ScanCancelled(Exception):
+    """Raised by LibraryIndex.load / sync when their should_stop callback asks them to stop."""
+
+
+def default_index_path():
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+    return os.path.join(cache_home, 'musicplayer', 'library.sqlite3')
+
+
+def add_scan_arguments(parser):
+    """Add the --rescan / --full-rescan / --workers / --watch / --music-dir switches to an argparse parser."""
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--rescan', dest='scan_mode', action='store_const', const=SCAN_RESCAN,
+                       help="Re-read tags of new or changed files before starting")
+    group.add_argument('--full-rescan', dest='scan_mode', action='store_const', const=SCAN_FULL,
+                       help="Ignore the library index and re-read every file")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Processes used to read tags (default: one per CPU)")
+    parser.add_argument('--watch', action='store_true',
+                        help="Keep the library up to date as files are added, changed or removed")
+    parser.add_argument('--music-dir', default=None,
+                        help="Directory to start browsing from (default: the one chosen last time)")
+    parser.set_defaults(scan_mode=SCAN_CACHED)
+
+
+class LibraryIndex:
+    """Persistent SQLite cache of the tags found under each music directory.
+
+    Files are identified by path and considered unchanged while their size
+    and mtime match the stored row, so a rescan only calls mutagen for new or
+    modified files. Files mutagen cannot read are remembered too (valid = 0)
+    so they are not retried until they change.
+
+    Besides the tags, each row keeps the track's length, bitrate, sample
+    rate, channels, track / disc number and year, when the file was first
+    indexed (its mtime at the time; kept when it is re-read) and its track
+    ID, so loading does not hash every path again. An index written before
+    those columns existed gets them added on open; rows missing tag columns
+    are marked stale so the next load of each directory reads the files
+    once more.
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or default_index_path()
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.executescript(SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+            return
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(tracks)")}
+        missing = [name for name, _ in MIGRATED_COLUMNS if name not in columns]
+        with self.conn:
+            for name, sql_type in MIGRATED_COLUMNS:
+                if name in missing:
+                    self.conn.execute(f"ALTER TABLE tracks ADD COLUMN {name} {sql_type}")
+            if 'added' in missing:
+                # The best guess for files indexed before: their mtime when last read
+                self.conn.execute("UPDATE tracks SET added = mtime_ns / 1e9 WHERE mtime_ns > 0")
+            if 'track_id' in missing:
+                self.conn.create_function('path_track_id', 1, path_track_id, deterministic=True)
+                self.conn.execute("UPDATE tracks SET track_id = path_track_id(path)")
+            if any(name not in OWN_COLUMNS for name in missing):
+                # Rows from before the tag columns: no stored stamp matches, and
+                # no directory counts as indexed, so each is re-read once
+                self.conn.execute("UPDATE tracks SET mtime_ns = -1")
+                self.conn.execute("DELETE FROM roots")
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def close(self):
+        self.conn.close()
+
+    def is_indexed(self, music_dir):
+        root = self._root(music_dir)
+        row = self.conn.execute("SELECT 1 FROM roots WHERE root = ?", (root,)).fetchone()
+        return row is not None
+
+    def load(self, music_dir, on_track=None, on_progress=None, should_stop=None):
+        """Return the stored tracks for music_dir as a TrackTable in scan order.
+
+        on_track(path, artist, title, album, ...) is called with the
+        TRACK_FIELDS of each track as it is read, for callers that display
+        the library while it loads, and on_progress(loaded) after every
+        batch of rows. should_stop() is checked between batches, as sync()
+        checks it between files, and raises ScanCancelled.
+        """
+        root = self._root(music_dir)
+        rows = self.conn.execute(
+            f"SELECT path, {TAG_COLUMNS} FROM tracks "
+            "WHERE root = ? AND valid = 1 ORDER BY seq", (root,))
+        table = TrackTable()
+        while True:
+            if should_stop is not None and should_stop():
+                raise ScanCancelled(root)
+            batch = rows.fetchmany(LOAD_BATCH_SIZE)
+            if not batch:
+                return table
+            table.extend(batch)
+            if on_track is not None:
+                for row in batch:
+                    on_track(*row)
+            if on_progress is not None:
+                on_progress(len(table))
+
+    def sync(self, music_dir, full=False, formats=SUPPORTED_FORMATS, workers=None,
+             on_track=None, on_progress=None, should_stop=None):
+        """Bring the index for music_dir up to date and return its tracks.
+
+        Tags of new or changed files are read by a pool of `workers`
+        processes (all cores by default) while the walk is still going.
+        Returns (tracks, parsed), where parsed is how many files were handed
+        to mutagen.
+
+        on_track(path, artist, title, album, ...) is called with the
+        TRACK_FIELDS of each track in scan order as soon as they are known,
+        on_progress(scanned) after every file the walk visits. If
+        should_stop() returns True the scan raises ScanCancelled and the
+        index is left untouched.
+        """
+        root = self._root(music_dir)
+        known = {row[0]: row[1:] for row in self.conn.execute(
+            f"SELECT path, size, mtime_ns, valid, {TAG_COLUMNS} FROM tracks WHERE root = ?",
+            (root,))}
+
+        table = TrackTable()
+        unchanged = []
+        changed = []
+        # Walk order; a file waiting for its tags holds back the ones after it
+        order = deque()
+        scanned = 0
+
+        def emit(song_path, valid, *tags):
+            if valid:
+                table.append(song_path, *tags)
+                if on_track is not None:
+                    on_track(song_path, *tags)
+
+        def pending_paths():
+            nonlocal scanned
+            for seq, entry in enumerate(iter_audio_entries(root, formats)):
+                if should_stop is not None and should_stop():
+                    raise ScanCancelled(root)
+                scanned += 1
+                if on_progress is not None:
+                    on_progress(scanned)
+                try:
+                    st = entry.stat()
+                except OSError as e:
+                    print(f"Skipping {entry.path}: {str(e)}")
+                    continue
+                stamp = (st.st_size, st.st_mtime_ns)
+                row = known.pop(entry.path, None)
+                if not full and row is not None and row[:2] == stamp:
+                    unchanged.append((seq, root, entry.path))
+                    if order:
+                        order.append((entry.path, seq, stamp, row[2:], None))
+                    else:
+                        emit(entry.path, *row[2:])
+                    continue
+                added = st.st_mtime_ns / 1e9 if row is None or row[-2] is None else row[-2]
+                order.append((entry.path, seq, stamp, None, added))
+                yield entry.path
+
+        for song_path, meta in read_metadata_many(pending_paths(), workers):
+            # Release everything up to and including this file, in walk order
+            while True:
+                path, seq, (size, mtime_ns), cached, added = order.popleft()
+                if cached is not None:
+                    emit(path, *cached)
+                    continue
+                tags = _tags(meta, path, added)
+                changed.append((root, path, seq, size, mtime_ns, int(meta is not None)) + tags)
+                if meta is not None:
+                    emit(path, 1, *tags)
+                break
+        while order:
+            path, _, _, cached, _ = order.popleft()
+            emit(path, *cached)
+
+        with self.conn:
+            self.conn.executemany("UPDATE tracks SET seq = ? WHERE root = ? AND path = ?", unchanged)
+            self.conn.executemany(INSERT_TRACK, changed)
+            # Whatever was not seen during the walk has been deleted
+            self.conn.executemany("DELETE FROM tracks WHERE root = ? AND path = ?",
+                                  [(root, path) for path in known])
+            self.conn.execute("INSERT OR REPLACE INTO roots (root, scanned_at) VALUES (?, ?)",
+                              (root, time.time()))
+        return table, len(changed)
+
+    def update_paths(self, music_dir, paths, formats=SUPPORTED_FORMATS, workers=None):
+        """Re-check some paths under music_dir and bring their rows up to date.
+
+        paths are files or directories, as reported by a LibraryWatcher. A
+        directory is walked and rows below it that the walk no longer finds
+        are dropped; a path that no longer exists drops its row, or every
+        row below it. Only new or changed files are read, and new tracks
+        are numbered after the existing ones so they load at the end.
+
+        Returns (changed, removed): the TRACK_FIELDS tuple of each track
+        that is new or has new tags, and the paths of tracks that
+        have left the library.
+        """
+        root = self._root(music_dir)
+        formats = frozenset(fmt.lower() for fmt in formats)
+        found = {}
+        cleared = []
+        for path in sorted(set(paths)):
+            if _hidden_or_outside(root, path):
+                continue
+            try:
+                st = os.stat(path)
+            except OSError:
+                cleared.append(path)
+                continue
+            if stat.S_ISDIR(st.st_mode):
+                for entry in iter_audio_entries(path, formats):
+                    try:
+                        entry_st = entry.stat()
+                    except OSError:
+                        continue
+                    found[entry.path] = (entry_st.st_size, entry_st.st_mtime_ns)
+                cleared.append(path)
+            elif os.path.splitext(path)[1].lower() in formats and stat.S_ISREG(st.st_mode):
+                found[path] = (st.st_size, st.st_mtime_ns)
+
+        # The rows already stored for the files found, in one query per batch
+        known = {}
+        found_paths = list(found)
+        for start in range(0, len(found_paths), PATH_QUERY_BATCH):
+            batch = found_paths[start:start + PATH_QUERY_BATCH]
+            known.update((row[0], row[1:]) for row in self.conn.execute(
+                "SELECT path, seq, size, mtime_ns, valid, added FROM tracks "
+                f"WHERE root = ? AND path IN ({', '.join('?' * len(batch))})", (root, *batch)))
+        stale = {}
+        for path in cleared:
+            # Everything strictly below path sorts between "path/" and "path0"
+            prefix = os.path.join(path, '')
+            for song_path, valid in self.conn.execute(
+                    "SELECT path, valid FROM tracks WHERE root = ? AND (path = ? OR (path >= ? AND path < ?))",
+                    (root, path, prefix, prefix[:-1] + chr(ord(os.sep) + 1))):
+                if song_path not in found:
+                    stale[song_path] = valid
+
+        pending = [path for path, stamp in found.items() if path not in known or known[path][1:3] != stamp]
+        next_seq = self.conn.execute("SELECT COALESCE(MAX(seq), -1) + 1 FROM tracks WHERE root = ?",
+                                     (root,)).fetchone()[0]
+        rows = []
+        changed = []
+        removed = [path for path, valid in stale.items() if valid]
+        for song_path, meta in read_metadata_many(pending, workers):
+            size, mtime_ns = found[song_path]
+            old = known.get(song_path)
+            if old is None:
+                seq, next_seq = next_seq, next_seq + 1
+                added = mtime_ns / 1e9
+            else:
+                seq = old[0]
+                added = mtime_ns / 1e9 if old[4] is None else old[4]
+            tags = _tags(meta, song_path, added)
+            rows.append((root, song_path, seq, size, mtime_ns, int(meta is not None)) + tags)
+            if meta is None:
+                if old is not None and old[3]:
+                    removed.append(song_path)
+            else:
+                changed.append((song_path,) + tags)
+
+        with self.conn:
+            self.conn.executemany(INSERT_TRACK, rows)
+            self.conn.executemany("DELETE FROM tracks WHERE root = ? AND path = ?",
+                                  [(root, path) for path in stale])
+        return changed, removed
+
+    @staticmethod
+    def _root(music_dir):
+        return os.path.abspath(os.path.expanduser(music_dir))
+
+
+def _tags(meta, song_path, added):
+    # A read_metadata dict (None for an unreadable file) as the row values
+    # after the path; OWN_COLUMNS are the index's own, not read from the file
+    own = (added, path_track_id(song_path))
+    if meta is None:
+        return NO_TAGS + own
+    return tuple(meta[field] for field in TRACK_FIELDS[1:-len(OWN_COLUMNS)]) + own
+
+
+def _hidden_or_outside(root, path):
+    # The walk skips hidden files and folders; a watcher may still report them
+    rel = os.path.relpath(path, root)
+    return rel != '.' and any(part.startswith('.') for part in rel.split(os.sep))
+
+
+def load_library(music_dir, scan_mode=SCAN_CACHED, index=None, workers=None,
+                 on_track=None, on_progress=None, should_stop=None):
+    """Return the TrackTable for music_dir using the persistent index.
+
+    The callbacks are passed on to LibraryIndex.load / LibraryIndex.sync.
+    """
+    own_index = index is None
+    index = index or LibraryIndex()
+    try:
+        if scan_mode == SCAN_CACHED and index.is_indexed(music_dir):
+            tracks = index.load(music_dir, on_track, on_progress, should_stop)
+            print(f"Loaded {len(tracks)} songs from library index (use --rescan to pick up changes)")
+            return tracks
+        tracks, parsed = index.sync(music_dir, full=(scan_mode == SCAN_FULL), workers=workers,
+                                    on_track=on_track, on_progress=on_progress,
+                                    should_stop=should_stop)
+        print(f"Read tags from {parsed} new or changed files")
+        return tracks
+    finally:
+        if own_index:
+            index.close()
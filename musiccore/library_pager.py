@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+
+import shutil
+
+from .track_table import format_duration
+
+# Lines kept free for the header, footer, command help and prompt
+RESERVED_LINES = 14
+MIN_PAGE_SIZE = 5
+
+PAGER_HELP = ("] / [ - Next / previous page\n"
+              "page <number> - Jump to page\n"
+              "/<text> - Search artists and titles (/ alone shows everything)")
+
+
+class LibraryPager:
+    """Screen-sized window over a TrackTable for the terminal players.
+
+    render() only touches the rows on the current page and returns the
+    whole listing as one string, so the cost of redrawing after each
+    command does not grow with the library. While search results are
+    shown the pages run over those tracks instead of the whole library.
+    Given a view order the library is paged in that order, and with
+    grouped=True each new artist / album on a page gets a heading.
+    """
+
+    def __init__(self, page_size=None):
+        self.page = 0
+        self.page_size = page_size
+        self.query = None
+        self.results = None
+
+    def show_results(self, query, results):
+        self.query = query
+        self.results = results
+        self.page = 0
+
+    def clear_results(self):
+        self.query = None
+        self.results = None
+        self.page = 0
+
+    def size(self):
+        if self.page_size:
+            return self.page_size
+        return max(MIN_PAGE_SIZE, shutil.get_terminal_size().lines - RESERVED_LINES)
+
+    def page_count(self, total):
+        return max(1, -(-total // self.size()))
+
+    def handle_command(self, choice, library):
+        """Apply a paging command; returns False if choice is not one."""
+        total = len(library) if self.results is None else len(self.results)
+        if choice == ']':
+            self.page += 1
+        elif choice == '[':
+            self.page -= 1
+        elif choice.startswith('page '):
+            try:
+                self.page = int(choice.split()[1]) - 1
+            except (ValueError, IndexError):
+                print("Invalid page number")
+        else:
+            return False
+        self.page = max(0, min(self.page, self.page_count(total) - 1))
+        return True
+
+    def render(self, library, order=None, grouped=False):
+        total = len(library) if self.results is None else len(self.results)
+        size = self.size()
+        pages = self.page_count(total)
+        self.page = max(0, min(self.page, pages - 1))
+        start = self.page * size
+        stop = min(start + size, total)
+
+        if self.results is None:
+            title = "Music Library"
+            if order is None:
+                rows = library.rows(start, stop)
+            else:
+                rows = ((idx, library.artist(idx), library.titles[idx]) for idx in order[start:stop])
+        else:
+            title = f"Search results for '{self.query}'"
+            rows = ((idx, library.artist(idx), library.titles[idx]) for idx in self.results[start:stop])
+        lines = [f"\n{title} (page {self.page + 1}/{pages}, "
+                 f"tracks {start + 1 if total else 0}-{stop} of {total}):", "-" * 50]
+        grouped = grouped and self.results is None
+        group = None
+        for idx, artist, title in rows:
+            if grouped:
+                # The heading names the artist and album; rows only the track
+                if group != (library.artist_ids[idx], library.album_ids[idx]):
+                    group = (library.artist_ids[idx], library.album_ids[idx])
+                    lines.append(_album_heading(library, idx))
+                number = library.track_numbers[idx]
+                label = f"{number:02d}. {title}" if number else title
+            else:
+                label = f"{artist} - {title}"
+            length = format_duration(library.durations[idx])
+            lines.append(f"{idx}: {label} ({length})" if length else f"{idx}: {label}")
+        lines.append("-" * 50)
+        return "\n".join(lines) + "\n"
+
+
+def _album_heading(library, idx):
+    year = library.years[idx]
+    album = library.album(idx) or "Unknown album"
+    return f"== {library.artist(idx)} - {album}" + (f" ({year}) ==" if year else " ==")
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+
+import os
+
+# Supported audio formats, matched case-insensitively
+SUPPORTED_FORMATS = frozenset({'.mp3', '.flac', '.wav', '.ogg'})
+
+
+def iter_audio_entries(music_dir, formats=SUPPORTED_FORMATS):
+    """Walk music_dir once and yield an os.DirEntry for every audio file.
+
+    Directories are listed with os.scandir so the file type comes from the
+    directory entry itself; entry.stat() results are cached on the entry for
+    callers that need size/mtime. Entries are yielded as soon as each
+    directory has been listed, so tag reading can overlap the walk.
+
+    Symlinks are followed, but every directory is walked once: one reached
+    again, say through a link to an ancestor, is skipped.
+    """
+    formats = frozenset(fmt.lower() for fmt in formats)
+    root = os.path.expanduser(music_dir)
+    seen_dirs = set()  # (st_dev, st_ino) of every directory visited
+    try:
+        st = os.stat(root)
+        seen_dirs.add((st.st_dev, st.st_ino))
+    except OSError:
+        pass  # reported when scandir fails below
+    stack = [root]
+
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError as e:
+            print(f"Skipping {current}: {str(e)}")
+            continue
+
+        subdirs = []
+        for entry in entries:
+            # Hidden files and folders are ignored, same as glob's '**'
+            if entry.name.startswith('.'):
+                continue
+            try:
+                if entry.is_dir():
+                    # One stat per directory, none per file
+                    st = entry.stat()
+                    key = (st.st_dev, st.st_ino)
+                    if key in seen_dirs:
+                        continue
+                    seen_dirs.add(key)
+                    subdirs.append(entry.path)
+                elif os.path.splitext(entry.name)[1].lower() in formats and entry.is_file():
+                    yield entry
+            except OSError:
+                continue
+
+        # Reverse so the stack pops subdirectories in sorted order
+        stack.extend(reversed(subdirs))
+
+
+def scan_music_files(music_dir, formats=SUPPORTED_FORMATS):
+    """Yield the path of every audio file under music_dir in a single pass."""
+    for entry in iter_audio_entries(music_dir, formats):
+        yield entry.path
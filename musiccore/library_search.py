@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+
+import math
+import re
+from array import array
+from bisect import bisect_left
+
+WORD_RE = re.compile(r"\w+")
+
+# Most results the front-ends ask for in one search
+SEARCH_RESULT_LIMIT = 500
+
+# Upper bound on labels read per query, to keep typing responsive: on a
+# big library each read is a cache miss, and they dominate a query's cost
+SEARCH_MAX_CHECKS = 6_000
+
+# A fuzzy match must share this fraction of the query's trigrams
+FUZZY_MIN_SCORE = 0.5
+# Upper bounds per fuzzy query: posting entries read while looking for
+# candidates, and candidate labels scored
+FUZZY_MAX_POSTINGS = 10_000
+FUZZY_MAX_CANDIDATES = 1_000
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class LibrarySearch:
+    """Incremental search over the artist and title columns of a TrackTable.
+
+    Two indexes are built once per library:
+    - a sorted word index (casefolded word, track idx) answering prefix
+      queries with a binary search;
+    - a trigram index (gram -> array of track ids) that narrows substring
+      and fuzzy queries down to a few candidate tracks.
+
+    search() returns track indexes, best matches first: word prefix matches,
+    then substring matches, then fuzzy (trigram overlap) matches. A query
+    whose candidates would take more than SEARCH_MAX_CHECKS label reads to
+    confirm returns the matches found within that many.
+    """
+
+    def __init__(self, library):
+        self.library = library
+        self.labels = []
+        word_pairs = []
+        grams = {}
+        for idx, artist, title in library.rows():
+            label = f"{artist} - {title}".casefold()
+            self.labels.append(label)
+            for word in set(WORD_RE.findall(label)):
+                word_pairs.append((word, idx))
+            for gram in _trigrams(label):
+                postings = grams.get(gram)
+                if postings is None:
+                    postings = grams[gram] = array('I')
+                postings.append(idx)
+        word_pairs.sort()
+        self.words = [word for word, _ in word_pairs]
+        self.word_ids = array('I', (idx for _, idx in word_pairs))
+        self.grams = grams
+
+    def search(self, query, limit=50):
+        query = query.casefold().strip()
+        if not query:
+            return []
+        results = []
+        seen = set()
+        labels = self.labels
+        checks = SEARCH_MAX_CHECKS
+        # Each stage hands over candidates and the words their labels must
+        # contain; candidates already found are skipped before any read
+        for ids, words in (self._prefix(query), self._substring(query)):
+            if words:
+                ids = ids[:checks]
+                checks -= len(ids)
+            word = words[0] if len(words) == 1 else None
+            for idx in ids:
+                if idx in seen:
+                    continue
+                if word is not None:
+                    if word not in labels[idx]:
+                        continue
+                elif words and not all(w in labels[idx] for w in words):
+                    continue
+                seen.add(idx)
+                results.append(idx)
+                if len(results) >= limit:
+                    return results
+        for idx in self._fuzzy(query, limit, checks):
+            if idx not in seen:
+                seen.add(idx)
+                results.append(idx)
+                if len(results) >= limit:
+                    return results
+        return results
+
+    def _prefix(self, query):
+        # Every query word must start a word of the track. The word with the
+        # fewest index entries drives the scan; the others only need to
+        # appear in the label
+        ranges = []
+        for word in WORD_RE.findall(query):
+            lo = bisect_left(self.words, word)
+            hi = bisect_left(self.words, word + '\U0010ffff', lo)
+            if lo == hi:
+                return (), ()
+            ranges.append((hi - lo, lo, hi, word))
+        if not ranges:
+            return (), ()
+        ranges.sort()
+        _, lo, hi, _ = ranges[0]
+        return self.word_ids[lo:hi], [word for _, _, _, word in ranges[1:]]
+
+    def _substring(self, query):
+        if len(query) < 3:
+            return (), ()
+        postings = [self.grams.get(gram) for gram in _trigrams(query)]
+        if any(p is None for p in postings):
+            return (), ()
+        # The shortest posting list, each candidate confirmed by its label
+        return min(postings, key=len), (query,)
+
+    def _fuzzy(self, query, limit, checks):
+        query_grams = _trigrams(query)
+        if not query_grams or not checks:
+            return []
+        need = max(1, math.ceil(FUZZY_MIN_SCORE * len(query_grams)))
+        postings = sorted((self.grams.get(gram, ()) for gram in query_grams), key=len)
+        # A label sharing `need` grams with the query shares at least two of
+        # the len - need + 2 rarest ones (one, when need is 1), so only labels
+        # in two of those lists are scored; past the budget they are cut short
+        once, twice = set(), set()
+        budget = FUZZY_MAX_POSTINGS
+        for gram_postings in postings[:len(postings) - need + 2]:
+            ids = set(gram_postings[:budget])
+            budget -= len(ids)
+            twice |= once & ids
+            once |= ids
+            if not budget:
+                break
+        candidates = sorted(once if need == 1 else twice)[:min(checks, FUZZY_MAX_CANDIDATES)]
+        # Score and index packed in one int: no tuple per candidate for the
+        # garbage collector to count
+        scored = []
+        for idx in candidates:
+            label = self.labels[idx]
+            score = 0
+            for gram in query_grams:
+                if gram in label:
+                    score += 1
+            if score >= need:
+                scored.append(-score << 32 | idx)
+        scored.sort()
+        return [key & 0xFFFFFFFF for key in scored[:limit]]
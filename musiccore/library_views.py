@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+
+import locale
+import os
+import threading
+from array import array
+from bisect import bisect_right
+
+# Orders the front-ends offer; VIEW_LIBRARY is the scan order itself
+VIEW_LIBRARY = 'library'
+VIEW_ARTIST = 'artist'  # artist, album, disc, track number, title
+VIEW_TITLE = 'title'
+VIEW_PATH = 'path'
+VIEW_ADDED = 'added'    # most recently added first
+VIEWS = (VIEW_LIBRARY, VIEW_ARTIST, VIEW_TITLE, VIEW_PATH, VIEW_ADDED)
+VIEW_HELP = f"sort <{'|'.join(VIEWS)}> - Order the library"
+# Past this many new rows a view is sorted again rather than merged
+MERGE_LIMIT_RATIO = 0.125
+
+
+def use_locale_collation():
+    """Sort text in the order of the user's locale; front-ends call this once in main()."""
+    try:
+        # Only collation: number and time formatting stay as they are
+        locale.setlocale(locale.LC_COLLATE, '')
+    except locale.Error:
+        pass  # an unknown LANG: fall back to code point order
+
+
+def collation_key(text):
+    """Sort key for text: case-insensitive, in the process's LC_COLLATE order."""
+    return locale.strxfrm(text.casefold())
+
+
+def _path_key(path):
+    # Per component, so a folder's files stay together whatever the locale
+    # makes of the separators
+    return tuple(map(collation_key, path.split(os.sep)))
+
+
+class LibraryViews:
+    """Sorted orders of one TrackTable, each computed once and then reused.
+
+    order(name) is a permutation of the track indexes as an array, cached
+    per view, so switching between views is a lookup; the permutation is
+    all a view keeps. Artists and albums are interned in the table, so
+    their collation keys are computed once per distinct name. Tracks
+    appended since (a scan still running, or new files from the watcher)
+    get keys of their own, are sorted, and are merged in with a binary
+    search each, which works out the keys of the few rows it probes. set()
+    edits in place bump the table's version, which makes each view sort
+    again the next time it is asked for.
+
+    A first sort takes seconds on a big library, so front-ends run it on
+    a worker thread (see PlayerEngine.set_order); ready(name) says whether
+    order(name) is quick.
+    """
+
+    def __init__(self, library):
+        self.library = library
+        self._orders = {}  # name -> (library version, permutation)
+        self._positions = {}  # name -> inverse permutation
+        self._artist_keys = []
+        self._album_keys = []
+        self._keys_lock = threading.Lock()  # a worker thread may be sorting another view
+
+    def order(self, name):
+        """Track indexes in view order, or None for VIEW_LIBRARY."""
+        if name == VIEW_LIBRARY:
+            return None
+        # Taken first: the table may grow while a worker thread sorts
+        version, count = self.library.version, len(self.library)
+        cached = self._orders.get(name)
+        if cached is not None and cached[0] == version:
+            perm = cached[1]
+            if len(perm) == count:
+                return perm
+            perm = self._merge(name, perm, count)
+        else:
+            perm = self._sort(name, count)
+        self._orders[name] = (version, perm)
+        self._positions.pop(name, None)
+        return perm
+
+    def ready(self, name):
+        """Whether order(name) is cached, give or take a merge of a few new rows."""
+        if name == VIEW_LIBRARY:
+            return True
+        cached = self._orders.get(name)
+        if cached is None or cached[0] != self.library.version:
+            return False
+        return len(self.library) - len(cached[1]) <= len(cached[1]) * MERGE_LIMIT_RATIO
+
+    def without(self, removed, library):
+        """Views of library, this table's without(removed), keeping the cached orders.
+
+        The rows left keep their relative order, so each permutation only
+        drops the removed rows and is renumbered; nothing is sorted again.
+        """
+        views = LibraryViews(library)
+        renumber = array('I', bytes(4 * len(self.library)))
+        kept = 0
+        for idx in range(len(self.library)):
+            renumber[idx] = kept
+            if idx not in removed:
+                kept += 1
+        for name, (version, perm) in self._orders.items():
+            if version == self.library.version:
+                views._orders[name] = (library.version,
+                                       array('I', [renumber[idx] for idx in perm if idx not in removed]))
+        return views
+
+    def position(self, name, idx):
+        """Where track idx appears in view name."""
+        perm = self.order(name)
+        if perm is None:
+            return idx
+        positions = self._positions.get(name)
+        if positions is None:
+            # Filled before it is stored: the backend thread asks for the next song too
+            positions = array('I', bytes(4 * len(perm)))
+            for pos, track in enumerate(perm):
+                positions[track] = pos
+            self._positions[name] = positions
+        return positions[idx]
+
+    def _sort(self, name, count):
+        # The keys only live as long as the sort
+        return array('I', sorted(range(count), key=self._key(name)))
+
+    def _merge(self, name, perm, count):
+        new = range(len(perm), count)
+        if len(new) > len(perm) * MERGE_LIMIT_RATIO:
+            return self._sort(name, count)
+        key = self._key(name)
+        merged = array('I')
+        start = 0
+        # Keys only for the new rows, and for the log(n) rows each one probes
+        for new_key, idx in sorted(zip(map(key, new), new)):
+            # After equal keys, as a stable sort would place the later index
+            at = bisect_right(perm, new_key, start, key=key)
+            merged.extend(perm[start:at])
+            merged.append(idx)
+            start = at
+        merged.extend(perm[start:])
+        return merged
+
+    def _key(self, name):
+        library = self.library
+        if name == VIEW_ARTIST:
+            artists = self._pool_keys(self._artist_keys, library.distinct_artists)
+            albums = self._pool_keys(self._album_keys, library.distinct_albums)
+            artist_ids, album_ids = library.artist_ids, library.album_ids
+            discs, tracks, titles = library.disc_numbers, library.track_numbers, library.titles
+            return lambda idx: (artists[artist_ids[idx]], albums[album_ids[idx]], discs[idx], tracks[idx],
+                                collation_key(titles[idx]))
+        if name == VIEW_TITLE:
+            titles = library.titles
+            return lambda idx: collation_key(titles[idx])
+        if name == VIEW_PATH:
+            paths = library.paths
+            return lambda idx: _path_key(paths[idx])
+        if name == VIEW_ADDED:
+            added = library.added
+            return lambda idx: -added[idx]
+        raise ValueError(f"Unknown view: {name}")
+
+    def _pool_keys(self, keys, strings):
+        # Interned names only grow, so keys for the new ones are appended
+        with self._keys_lock:
+            keys.extend(map(collation_key, strings[len(keys):]))
+        return keys
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import threading
+import time
+
+from .library_scanner import SUPPORTED_FORMATS, iter_audio_entries
+
+# A batch is handed over once no event has arrived for this long...
+WATCH_DEBOUNCE_SECONDS = 2.0
+# ...or once its first event is this old, so a long copy still shows up
+WATCH_MAX_DELAY_SECONDS = 10.0
+# Polling stats every file, so it runs far less often than inotify reports
+POLL_INTERVAL_SECONDS = 30.0
+
+# From <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct('iIII')
+
+
+class LibraryWatcher:
+    """Reports changes under a music directory in debounced batches.
+
+    On Linux every directory gets an inotify watch (new directories are
+    added as they appear); elsewhere, or when the watch limit is reached,
+    the tree is polled every poll_interval seconds by comparing file sizes
+    and mtimes. Events are collected until none has arrived for `debounce`
+    seconds (or the oldest is `max_delay` old), then on_batch(paths) runs
+    on the watcher's thread with the set of files and directories that
+    were created, written, moved or deleted. Copying an album is one batch,
+    not one per file.
+    """
+
+    def __init__(self, music_dir, on_batch, formats=SUPPORTED_FORMATS, debounce=WATCH_DEBOUNCE_SECONDS,
+                 max_delay=WATCH_MAX_DELAY_SECONDS, poll_interval=POLL_INTERVAL_SECONDS, use_inotify=True):
+        self.root = os.path.abspath(os.path.expanduser(music_dir))
+        self.on_batch = on_batch
+        self.formats = frozenset(fmt.lower() for fmt in formats)
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.method = None
+        self._fd = None
+        self._watches = {}  # watch descriptor -> directory
+        self._libc = None
+        self._wake_r, self._wake_w = os.pipe()
+        self._stopped = False
+        self._thread = None
+        if use_inotify:
+            self._start_inotify()
+
+    def start(self):
+        if self.method is None:
+            self.method = 'poll'
+        if self.method == 'inotify':
+            target, args = self._inotify_loop, ()
+        else:
+            # Taken now, so changes made once start() returns are all seen
+            target, args = self._poll_loop, (self._snapshot(),)
+        self._thread = threading.Thread(target=target, args=args, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped = True
+        os.write(self._wake_w, b'x')
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+            if self._thread.is_alive():
+                return  # still applying a batch; it is a daemon thread
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        os.close(self._wake_r)
+        os.close(self._wake_w)
+
+    # inotify
+
+    def _start_inotify(self):
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+            fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        except (OSError, AttributeError):
+            return  # not Linux
+        if fd < 0:
+            return
+        self._libc, self._fd = libc, fd
+        try:
+            self._watch_tree(self.root)
+        except OSError as e:
+            # Usually ENOSPC: fs.inotify.max_user_watches is too low for the tree
+            print(f"Watching {self.root} by polling: {e}")
+            os.close(fd)
+            self._fd = None
+            self._watches.clear()
+            return
+        self.method = 'inotify'
+
+    def _watch_tree(self, top):
+        stack = [top]
+        while stack:
+            current = stack.pop()
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(current), WATCH_MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                if err in (errno.ENOENT, errno.ENOTDIR, errno.EACCES):
+                    continue  # gone already, or unreadable like the scan would find it
+                raise OSError(err, os.strerror(err), current)
+            self._watches[wd] = current
+            try:
+                with os.scandir(current) as it:
+                    stack.extend(entry.path for entry in it
+                                 if not entry.name.startswith('.') and entry.is_dir(follow_symlinks=False))
+            except OSError:
+                continue
+
+    def _read_events(self, pending):
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                pending.add(self.root)  # events were lost: recheck everything
+                continue
+            if mask & IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+            directory = self._watches.get(wd)
+            if directory is None or not name or name.startswith('.'):
+                continue
+            path = os.path.join(directory, name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    try:
+                        self._watch_tree(path)
+                    except OSError as e:
+                        print(f"Cannot watch {path}: {e}")
+                pending.add(path)
+            elif os.path.splitext(name)[1].lower() in self.formats:
+                pending.add(path)
+
+    def _inotify_loop(self):
+        pending = set()
+        first = last = None
+        while not self._stopped:
+            timeout = None
+            if pending:
+                timeout = max(0.0, min(last + self.debounce, first + self.max_delay) - time.monotonic())
+            ready, _, _ = select.select([self._fd, self._wake_r], [], [], timeout)
+            if self._wake_r in ready:
+                break
+            if self._fd in ready:
+                self._read_events(pending)
+                now = time.monotonic()
+                if pending:
+                    last = now
+                    first = first or now
+            if pending and time.monotonic() >= min(last + self.debounce, first + self.max_delay):
+                batch, pending = pending, set()
+                first = last = None
+                self._deliver(batch)
+
+    # Polling
+
+    def _snapshot(self):
+        snapshot = {}
+        for entry in iter_audio_entries(self.root, self.formats):
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            snapshot[entry.path] = (st.st_size, st.st_mtime_ns)
+        return snapshot
+
+    def _poll_loop(self, before):
+        while not self._stopped:
+            ready, _, _ = select.select([self._wake_r], [], [], self.poll_interval)
+            if ready:
+                break
+            after = self._snapshot()
+            changed = {path for path, stamp in after.items() if before.get(path) != stamp}
+            changed.update(path for path in before if path not in after)
+            before = after
+            if changed:
+                self._deliver(changed)
+
+    def _deliver(self, batch):
+        try:
+            self.on_batch(batch)
+        except Exception as e:
+            print(f"Library update failed: {e}")
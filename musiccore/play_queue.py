@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+
+import random
+import threading
+from collections import deque
+
+# Songs remembered for going back; older ones drop off the far end
+HISTORY_LIMIT = 1000
+# Played slots kept at the front of the upcoming list before it is compacted
+COMPACT_MIN = 1024
+
+QUEUE_HELP = ("n / b - Next / previous song\n"
+              "a <number> - Add song to the queue\n"
+              "shuffle - Toggle shuffled queue order\n"
+              "load <file> / save <file> - Queue an M3U/PLS playlist / save the queue")
+
+
+class PlayQueue:
+    """Upcoming songs and recently played ones, as library track IDs.
+
+    IDs rather than indexes, so the queue stays valid while the library
+    gains and loses rows; only songs that have left it are dropped, with
+    discard().
+
+    The upcoming songs are a list read from a head index: adding appends,
+    taking the next song moves the index on, and the played slots are
+    cut off in one go once they are the larger part of the list. The
+    history is a bounded deque for going back. Shuffling is an
+    incremental Fisher-Yates: each time the next song is needed one of
+    the remaining songs is picked at random and swapped into the head
+    slot, an O(1) list swap, so turning shuffle on never reorders or
+    copies the queue.
+
+    The backend thread peeks at the next song while the front-end edits
+    the queue, so every method takes a lock.
+    """
+
+    def __init__(self, rng=None):
+        self.upcoming = []
+        self._head = 0  # upcoming[:_head] has been played
+        self.history = deque(maxlen=HISTORY_LIMIT)
+        self.current = None
+        self.shuffle = False
+        self._rng = rng or random.Random()
+        self._front_drawn = False  # front already chosen, by a shuffle draw or by back()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.upcoming) - self._head
+
+    def __iter__(self):
+        # A snapshot: the backend thread may take songs off while it is read
+        with self._lock:
+            return iter(self.upcoming[self._head:])
+
+    def add(self, track_id):
+        with self._lock:
+            self.upcoming.append(track_id)
+
+    def extend(self, track_ids):
+        # track_ids may be a generator reading a playlist file, so the lock is
+        # only held per song, not while it runs
+        count = 0
+        for track_id in track_ids:
+            self.add(track_id)
+            count += 1
+        return count
+
+    def clear(self):
+        with self._lock:
+            self.upcoming = []
+            self._head = 0
+            self._front_drawn = False
+
+    def discard(self, gone):
+        """Forget the songs whose IDs are in the set gone, e.g. deleted files."""
+        with self._lock:
+            self.upcoming = [track_id for track_id in self.upcoming[self._head:] if track_id not in gone]
+            self._head = 0
+            self.history = deque((track_id for track_id in self.history if track_id not in gone),
+                                 maxlen=HISTORY_LIMIT)
+            if self.current in gone:
+                self.current = None
+            self._front_drawn = False
+
+    def set_shuffle(self, shuffle):
+        with self._lock:
+            self.shuffle = shuffle
+            self._front_drawn = False
+
+    def peek(self, fallback=None):
+        """Return the song that plays next, or fallback when the queue is empty."""
+        with self._lock:
+            upcoming, head = self.upcoming, self._head
+            if head == len(upcoming):
+                return fallback
+            if self.shuffle and not self._front_drawn:
+                # One Fisher-Yates step: any remaining song is equally likely
+                pick = head + self._rng.randrange(len(upcoming) - head)
+                upcoming[head], upcoming[pick] = upcoming[pick], upcoming[head]
+            self._front_drawn = True
+            return upcoming[head]
+
+    def advance(self, track_id):
+        """Make track_id the current song, taking it off the queue if it was next."""
+        with self._lock:
+            upcoming, head = self.upcoming, self._head
+            if head < len(upcoming) and self._front_drawn and upcoming[head] == track_id:
+                head += 1
+                if head >= COMPACT_MIN and head * 2 >= len(upcoming):
+                    # Amortised O(1): fewer songs are moved than were played
+                    del upcoming[:head]
+                    head = 0
+                self._head = head
+                self._front_drawn = False
+            if self.current is not None:
+                self.history.append(self.current)
+            self.current = track_id
+
+    def back(self):
+        """Return to the previous song; the current one becomes next again."""
+        with self._lock:
+            if not self.history:
+                return None
+            if self.current is not None:
+                if self._head:
+                    self._head -= 1
+                    self.upcoming[self._head] = self.current
+                else:
+                    self.upcoming.insert(0, self.current)
+                self._front_drawn = True
+            self.current = self.history.pop()
+            return self.current
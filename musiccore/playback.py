@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+
+import atexit
+import json
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from collections import deque
+
+BACKENDS = ('auto', 'mpv', 'ffplay')
+
+
+def add_playback_arguments(parser):
+    parser.add_argument('--backend', choices=BACKENDS, default='auto',
+                        help="Audio backend: a persistent mpv process, or one ffplay per song "
+                             "(auto prefers mpv when installed)")
+
+
+def create_backend(name='auto', null_audio=False, asynchronous=False):
+    """Return a playback backend by name; 'auto' uses mpv when it is installed.
+
+    asynchronous picks the ffplay backend that runs on an asyncio loop.
+    """
+    if name == 'auto':
+        name = 'mpv' if shutil.which('mpv') else 'ffplay'
+        if name == 'ffplay' and not shutil.which('ffplay'):
+            # The library can still be browsed; each play reports the failure
+            print("Neither mpv nor ffplay was found; install one of them to play music")
+    if name == 'mpv':
+        return MpvBackend(null_audio=null_audio)
+    if asynchronous:
+        return AsyncFfplayBackend(null_audio=null_audio)
+    return FfplayBackend(null_audio=null_audio)
+
+
+class FfplayBackend:
+    """Spawns a fresh ffplay process for every song (the original behaviour).
+
+    A watcher thread waits on each process; when a song runs to the end
+    the next one from next_track() is started. That leaves the gap of a
+    process start between songs, so mpv is preferred when installed.
+    """
+    name = 'ffplay'
+
+    def __init__(self, null_audio=False):
+        self.process = None
+        self.current_path = None
+        self.next_track = None
+        self.on_track_change = None
+        self.env = dict(os.environ, SDL_AUDIODRIVER='dummy') if null_audio else None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def command(path):
+        # -nodisp prevents the video window, -autoexit stops when done
+        return ['ffplay', '-nodisp', '-autoexit', path]
+
+    def play(self, path):
+        self.stop()
+        with self._lock:
+            self._start(path)
+        self._notify(path)
+
+    def _start(self, path):
+        process = subprocess.Popen(self.command(path), env=self.env,
+                                   stdout=subprocess.DEVNULL,
+                                   stderr=subprocess.DEVNULL)
+        self.process = process
+        self.current_path = path
+        threading.Thread(target=self._watch, args=(process,), daemon=True).start()
+
+    def _watch(self, process):
+        returncode = process.wait()
+        with self._lock:
+            if process is not self.process:
+                return  # stopped or replaced by play()
+            self.process = None
+            next_path = None
+            if returncode == 0 and self.next_track is not None:
+                next_path = self.next_track(self.current_path)
+            self.current_path = None
+            if next_path:
+                self._start(next_path)
+        self._notify(next_path)
+
+    def _notify(self, path):
+        if self.on_track_change is not None:
+            self.on_track_change(path)
+
+    def refresh_next(self):
+        pass  # the next song is only chosen when the current one ends
+
+    def stop(self):
+        with self._lock:
+            process, self.process = self.process, None
+            self.current_path = None
+        if process:
+            process.terminate()
+            self._notify(None)
+
+    def is_playing(self):
+        process = self.process
+        return process is not None and process.poll() is None
+
+    def close(self):
+        self.stop()
+
+
+class AsyncFfplayBackend(FfplayBackend):
+    """FfplayBackend for asyncio front-ends.
+
+    ffplay is started with asyncio.create_subprocess_exec and a task on
+    the running loop awaits its exit, so song changes are reported on the
+    loop rather than from a watcher thread. play() must be called from a
+    running event loop.
+    """
+
+    def __init__(self, null_audio=False):
+        super().__init__(null_audio)
+        self._task = None
+
+    def play(self, path):
+        import asyncio  # only asyncio front-ends use this backend; the GUI never loads it
+        self.stop()
+        self._task = asyncio.get_running_loop().create_task(self._play_from(path))
+
+    async def _play_from(self, path):
+        import asyncio
+        while path:
+            try:
+                process = await asyncio.create_subprocess_exec(*self.command(path), env=self.env,
+                                                               stdout=subprocess.DEVNULL,
+                                                               stderr=subprocess.DEVNULL)
+            except OSError as e:
+                # Nobody awaits this task, so the error is reported here
+                print(f"Could not start ffplay: {e}")
+                break
+            self.process = process
+            self.current_path = path
+            self._notify(path)
+            returncode = await process.wait()
+            self.process = None
+            self.current_path = None
+            if returncode == 0 and self.next_track is not None:
+                path = self.next_track(path)
+            else:
+                path = None
+        self._notify(None)
+
+    def stop(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+        process, self.process = self.process, None
+        self.current_path = None
+        if process is not None and process.returncode is None:
+            try:
+                process.terminate()
+            except ProcessLookupError:
+                pass  # the loop that owned it has already shut down
+            self._notify(None)
+
+    def is_playing(self):
+        # True from play() on, including while ffplay is still being started
+        return self._task is not None and not self._task.done()
+
+
+class MpvError(Exception):
+    pass
+
+
+class MpvBackend:
+    """One long-lived mpv process controlled over its JSON IPC socket.
+
+    mpv is started once in idle mode; changing songs is a 'loadfile'
+    command to the running decoder instead of a new process. Player events
+    (start-file, playback-restart, end-file, ...) are read on a background
+    thread and passed to on_event(event_dict) if it is set; the callback
+    runs on that thread.
+
+    Whenever a song starts, the song after it (from next_track(path)) is
+    appended to mpv's playlist. With --prefetch-playlist mpv opens and
+    starts decoding it before the current one ends, and --gapless-audio
+    joins the two without a gap in the output.
+    """
+    name = 'mpv'
+
+    def __init__(self, null_audio=False, extra_args=(), start_timeout=5.0):
+        self.on_event = None
+        self.next_track = None
+        self.on_track_change = None
+        self.current_path = None
+        self._request_id = 0
+        self._responses = {}
+        self._cond = threading.Condition()
+        self._events = deque(maxlen=256)
+        self._playing = False
+        self._send_lock = threading.Lock()
+        self._next_lock = threading.Lock()
+
+        self._tmpdir = tempfile.mkdtemp(prefix='musicplayer-mpv-')
+        self.socket_path = os.path.join(self._tmpdir, 'ipc.sock')
+        args = ['mpv', '--idle=yes', '--no-video', '--no-terminal',
+                '--gapless-audio=yes', '--prefetch-playlist=yes',
+                f'--input-ipc-server={self.socket_path}']
+        if null_audio:
+            args.append('--ao=null')
+        self.process = subprocess.Popen(args + list(extra_args),
+                                        stdin=subprocess.DEVNULL,
+                                        stdout=subprocess.DEVNULL,
+                                        stderr=subprocess.DEVNULL)
+        self.sock = self._connect(start_timeout)
+        self._reader = threading.Thread(target=self._read_loop, daemon=True)
+        self._reader.start()
+        atexit.register(self.close)
+        # Reported as a property-change event whenever mpv moves to another file
+        self.command('observe_property', 1, 'path')
+
+    def _connect(self, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                sock.connect(self.socket_path)
+                return sock
+            except OSError:
+                sock.close()
+                if self.process.poll() is not None or time.monotonic() > deadline:
+                    self.process.kill()
+                    shutil.rmtree(self._tmpdir, ignore_errors=True)
+                    raise MpvError("mpv did not start")
+                time.sleep(0.01)
+
+    def _read_loop(self):
+        buffer = b''
+        while True:
+            try:
+                data = self.sock.recv(65536)
+            except OSError:
+                data = b''
+            if not data:
+                break
+            buffer += data
+            *lines, buffer = buffer.split(b'\n')
+            for line in lines:
+                if line:
+                    self._dispatch(json.loads(line))
+        with self._cond:
+            self._playing = False
+            self._cond.notify_all()
+
+    def _dispatch(self, message):
+        event = message.get('event')
+        with self._cond:
+            if event is None:
+                # Replies to _send() carry request_id 0 and nobody waits for them
+                if message.get('request_id'):
+                    self._responses[message['request_id']] = message
+            else:
+                if event == 'start-file':
+                    self._playing = True
+                elif event == 'idle':
+                    self._playing = False
+                self._events.append(message)
+            self._cond.notify_all()
+        if event == 'property-change' and message.get('name') == 'path':
+            self._track_changed(message.get('data'))
+        if event is not None and self.on_event is not None:
+            self.on_event(message)
+
+    def _track_changed(self, path):
+        with self._cond:
+            self.current_path = path
+            self._playing = path is not None
+        if self.on_track_change is not None:
+            self.on_track_change(path)
+        if path is not None:
+            self.refresh_next()
+
+    def _send(self, *args):
+        # Fire-and-forget: safe to call from the reader thread, which
+        # could not wait for its own reply
+        with self._send_lock:
+            try:
+                self.sock.sendall((json.dumps({'command': list(args)}) + '\n').encode('utf-8'))
+            except OSError:
+                pass  # mpv has gone away; the reader sees the closed socket
+
+    def refresh_next(self):
+        """Re-ask next_track() and replace the song queued after the current one."""
+        path = self.current_path
+        if path is None or self.next_track is None:
+            return
+        with self._next_lock:
+            next_path = self.next_track(path)
+            # playlist-clear keeps the current entry, so playback is untouched
+            self._send('playlist-clear')
+            if next_path:
+                self._send('loadfile', next_path, 'append')
+
+    def command(self, *args, timeout=5.0):
+        """Send one IPC command and wait for mpv's reply."""
+        with self._send_lock:
+            self._request_id += 1
+            request_id = self._request_id
+            payload = json.dumps({'command': list(args), 'request_id': request_id}) + '\n'
+            self.sock.sendall(payload.encode('utf-8'))
+        with self._cond:
+            if not self._cond.wait_for(lambda: request_id in self._responses, timeout):
+                raise MpvError(f"No reply to {args[0]}")
+            reply = self._responses.pop(request_id)
+        if reply.get('error') != 'success':
+            raise MpvError(f"{args[0]} failed: {reply.get('error')}")
+        return reply.get('data')
+
+    def wait_for_event(self, name, timeout=5.0):
+        """Block until mpv emits event `name`; earlier events are discarded."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                while self._events:
+                    event = self._events.popleft()
+                    if event.get('event') == name:
+                        return event
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+
+    def clear_events(self):
+        with self._cond:
+            self._events.clear()
+
+    def play(self, path):
+        with self._cond:
+            self._playing = True
+        self.command('loadfile', path, 'replace')
+
+    def stop(self):
+        if self.process.poll() is None:
+            self.command('stop')
+
+    def is_playing(self):
+        return self._playing and self.process.poll() is None
+
+    def close(self):
+        atexit.unregister(self.close)
+        if self.process.poll() is None:
+            try:
+                self.command('quit', timeout=1.0)
+            except (OSError, MpvError):
+                pass
+            try:
+                self.process.wait(timeout=2.0)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self.sock.close()
+        shutil.rmtree(self._tmpdir, ignore_errors=True)
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+
+import os
+from urllib.parse import unquote, urlparse
+
+PLAYLIST_FORMATS = frozenset({'.m3u', '.m3u8', '.pls'})
+
+
+def _playlist_format(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in PLAYLIST_FORMATS:
+        raise ValueError(f"Unsupported playlist format: {ext or path}")
+    return 'pls' if ext == '.pls' else 'm3u'
+
+
+def _resolve(entry, base_dir):
+    if entry.startswith('file://'):
+        return unquote(urlparse(entry).path)
+    if '://' in entry:
+        return None  # streams and other URLs are not library songs
+    return os.path.normpath(os.path.join(base_dir, os.path.expanduser(entry)))
+
+
+def iter_playlist(path):
+    """Yield the song paths listed in an M3U or PLS file, one line at a time.
+
+    Relative entries are resolved against the playlist's directory; URLs
+    other than file:// are skipped.
+    """
+    kind = _playlist_format(path)
+    base_dir = os.path.dirname(os.path.abspath(path))
+    with open(path, encoding='utf-8', errors='replace') as f:
+        for line in f:
+            line = line.strip()
+            if kind == 'pls':
+                key, sep, value = line.partition('=')
+                if not (sep and key.lower().startswith('file')):
+                    continue
+                line = value.strip()
+            elif line.startswith('#'):
+                continue
+            if line:
+                song_path = _resolve(line, base_dir)
+                if song_path is not None:
+                    yield song_path
+
+
+def write_playlist(path, entries):
+    """Write (song_path, label, seconds) entries as M3U or PLS, chosen by extension.
+
+    seconds is the song's length, 0 when unknown.
+
+    Entries are written as they are produced, so the whole playlist is
+    never held in memory. Returns the number of songs written.
+    """
+    kind = _playlist_format(path)
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        if kind == 'pls':
+            f.write("[playlist]\n")
+            for count, (song_path, label, seconds) in enumerate(entries, 1):
+                f.write(f"File{count}={song_path}\nTitle{count}={label}\n"
+                        f"Length{count}={round(seconds) or -1}\n")
+            f.write(f"NumberOfEntries={count}\nVersion=2\n")
+        else:
+            f.write("#EXTM3U\n")
+            for count, (song_path, label, seconds) in enumerate(entries, 1):
+                f.write(f"#EXTINF:{round(seconds) or -1},{label}\n{song_path}\n")
+    return count
@@ -0,0 +1,449 @@
+#!/usr/bin/env python3
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+from .dir_browser import DirectoryBrowser
+from .engine import PlayerEngine
+from .library_index import add_scan_arguments, SCAN_CACHED
+from .library_pager import LibraryPager, PAGER_HELP
+from .library_search import LibrarySearch
+from .library_views import use_locale_collation, VIEW_ARTIST, VIEW_HELP, VIEWS
+from .play_queue import QUEUE_HELP
+from .playback import add_playback_arguments
+from .track_table import format_duration
+
+# Directories listed at once; a longer listing is narrowed by typing
+BROWSE_LIST_LIMIT = 200
+
+
+def read_line(prompt="> "):
+    """input() without read-ahead: reads stdin's fd up to the newline and no further.
+
+    TuiLoop reads the fd itself once the directory is chosen; lines that
+    input() had already pulled into sys.stdin's buffer would never reach it.
+    """
+    sys.stdout.write(prompt)
+    sys.stdout.flush()
+    fd = sys.stdin.fileno()
+    line = bytearray()
+    while True:
+        byte = os.read(fd, 1)
+        if not byte:
+            if not line:
+                raise EOFError
+            break
+        if byte == b'\n':
+            break
+        line += byte
+    return line.decode('utf-8', errors='replace')
+
+
+def browse_directory(current_dir=None, browser=None):
+    """Let the user walk the file system and return the chosen directory.
+
+    Starts at current_dir, else the directory chosen last time. Besides
+    the numbers, typing a name or path goes straight there, and typing the
+    start of a name narrows the list (or enters the only match).
+    """
+    browser = browser or DirectoryBrowser()
+    current_dir = browser.start_dir(current_dir)
+    shown = None  # indexes left by type-ahead, None for all
+    while True:
+        try:
+            dirs = browser.subdirs(current_dir)
+        except OSError as e:
+            print(f"Cannot list {current_dir}: {e}")
+            dirs = []
+        listed = range(len(dirs)) if shown is None else shown
+
+        print(f"\nCurrent directory: {current_dir}")
+        print("Directories and options:")
+        print("-" * 50)
+        for i in listed[:BROWSE_LIST_LIMIT]:
+            print(f"{i}: {dirs[i]}")
+        if len(listed) > BROWSE_LIST_LIMIT:
+            print(f"... and {len(listed) - BROWSE_LIST_LIMIT} more: type the start of a name to narrow the list")
+
+        print(f"p: Use parent directory ({os.path.dirname(current_dir)})")
+        print("s: Select this directory")
+        print("q: Quit")
+        print("<name> / <path>: Go to the directory starting with name, or to path")
+
+        text = read_line().strip()
+        choice = text.lower()
+        shown = None
+
+        if choice.isdigit():
+            idx = int(choice)
+            if 0 <= idx < len(dirs):
+                current_dir = os.path.join(current_dir, dirs[idx])
+            else:
+                print("Invalid directory number")
+
+        elif choice == 'p':
+            parent = os.path.dirname(current_dir)
+            if parent != current_dir:  # Avoid infinite loop at root
+                current_dir = parent
+            else:
+                print("Already at root")
+
+        elif choice == 's':
+            browser.remember(current_dir)
+            return current_dir
+
+        elif choice == 'q':
+            print("Goodbye!")
+            sys.exit(0)
+
+        elif not text:
+            print("Invalid option")
+
+        elif browser.resolve(current_dir, text):
+            current_dir = browser.resolve(current_dir, text)
+
+        elif os.sep in text:
+            print(f"No such directory: {text}")
+
+        else:
+            matches = browser.matching(current_dir, text) if dirs else []
+            if len(matches) == 1:
+                current_dir = os.path.join(current_dir, dirs[matches[0]])
+            elif matches:
+                shown = matches
+            else:
+                print(f"No directory starting with '{text}'")
+
+
+class ConsolePlayer:
+    """Paged library with play / stop commands on an asyncio event loop.
+
+    All the work is done by a PlayerEngine; this class only prints. It
+    is the whole of musicplayer.py and musicplayer2.py, and TerminalPlayer
+    adds the queue and playlists on top of it. Commands, playback events,
+    watcher updates and the elapsed-time ticker all run on one event loop
+    (TuiLoop), so songs that start or end by themselves are announced as
+    they do. Subclasses show cover art by overriding display_artwork(),
+    cancel_artwork() and close().
+    """
+
+    def __init__(self, scan_mode=SCAN_CACHED, workers=None, backend='auto', watch=False, music_dir=None):
+        self.engine = PlayerEngine(scan_mode, workers, backend, asynchronous=True)
+        self.engine.on_library_change = self.on_library_change
+        self.engine.on_song_change = self.on_song_change
+        self.pager = LibraryPager()
+        self.watch = watch
+        self.music_dir = music_dir  # where the directory browser starts
+        self.ui = None
+        self.announced = None  # song the screen last said is playing
+        self.song_started = None
+        self.search_thread = None
+        self.pending_search = None  # query to run once the search index is built
+
+    @property
+    def music_library(self):
+        return self.engine.music_library
+
+    def choose_directory(self):
+        return browse_directory(self.music_dir)
+
+    def build_library(self, music_dir):
+        print("Scanning music directory...")
+        self.engine.build_library(music_dir)
+        total = format_duration(self.music_library.total_duration())
+        print(f"Found {len(self.music_library)} songs" + (f" ({total})" if total else ""))
+
+    def search_library(self, query):
+        query = query.strip()
+        if not query:
+            self.pager.clear_results()
+            return
+        if self.engine.search_ready():
+            self.pager.show_results(query, self.engine.search_library(query))
+            return
+        # Building takes seconds on a big library, so it runs on a thread
+        # and the latest query runs once the index is ready
+        self.pending_search = query
+        if self.search_thread is None:
+            print("Indexing library for search...")
+            self.search_thread = threading.Thread(target=self.build_search_index,
+                                                  args=(self.engine.music_library,), daemon=True)
+            self.search_thread.start()
+
+    def build_search_index(self, library):
+        # Worker thread; rows() copies what it reads, so the library can grow meanwhile
+        self.ui.post(self.search_index_ready, library, LibrarySearch(library))
+
+    def search_index_ready(self, library, search):
+        self.search_thread = None
+        query, self.pending_search = self.pending_search, None
+        if library is self.engine.music_library:
+            self.engine.search = search
+        if query is None:
+            return
+        if self.engine.search_ready():
+            self.pager.show_results(query, self.engine.search_library(query))
+            self.ui.above_prompt(self.display_library)
+        else:
+            self.search_library(query)  # the library changed meanwhile
+
+    def start_watching(self, post):
+        method = self.engine.watch(post)
+        print(f"Watching {self.engine.music_dir} for changes ({method})")
+
+    def on_library_change(self, added, updated, removed):
+        if self.pager.query is not None:
+            # The results are track indexes, which removals renumber
+            query = self.pager.query
+            self.pager.show_results(query, [])
+            self.search_library(query)
+        self.notify(f"Library updated: {added} added, {updated} changed, {removed} removed "
+                    f"({len(self.music_library)} songs)")
+
+    def notify(self, text):
+        self.ui.notify(text)
+
+    def display_library(self):
+        # Only the current page is rendered, in a single write
+        sys.stdout.write(self.pager.render(self.music_library, self.engine.view_order(),
+                                           grouped=self.engine.order_name == VIEW_ARTIST))
+        sys.stdout.flush()
+
+    def sort_library(self, name):
+        if name not in VIEWS:
+            print(f"Unknown order '{name}'; choose one of: {', '.join(VIEWS)}")
+            return
+        if self.engine.set_order(name, self.ui.post, self.order_ready):
+            self.pager.page = 0
+        else:
+            print(f"Sorting the library by {name}...")
+
+    def order_ready(self):
+        # On the event loop, once a worker thread has sorted the new view
+        self.pager.page = 0
+        self.ui.above_prompt(self.display_library)
+
+    def play_song(self, song_idx):
+        song = self.engine.play(song_idx)
+        if song is None:
+            print("Invalid song selection")
+        else:
+            self.show_playing(song)
+
+    def show_playing(self, song):
+        print(f"\nPlaying: {song['artist']} - {song['title']}")
+        self.announced = song
+        self.song_started = time.monotonic()
+        self.display_artwork(song)
+
+    def stop_song(self):
+        if not self.engine.stop():
+            return False
+        self.announced = None
+        self.cancel_artwork()
+        return True
+
+    def show_menu(self):
+        self.display_library()
+        print("\nCommands:")
+        print("p <number> - Play song")
+        print("s - Stop current song")
+        print("q - Quit")
+        print(PAGER_HELP)
+        print(VIEW_HELP)
+
+    def handle_command(self, command):
+        """Run one command line; returns False once the user quits."""
+        choice = command.lower()
+
+        if self.pager.handle_command(choice, self.music_library):
+            pass
+        elif choice.startswith('/'):
+            self.search_library(choice[1:])
+
+        elif choice == 'sort' or choice.startswith('sort '):
+            self.sort_library(choice[4:].strip())
+
+        elif choice.startswith('p '):
+            try:
+                self.play_song(int(choice.split()[1]))
+            except (ValueError, IndexError):
+                print("Invalid song number")
+
+        elif choice == 's':
+            self.stop_song()
+            print("Stopped")
+
+        elif choice == 'q':
+            print("Goodbye!")
+            return False
+
+        else:
+            print("Invalid command")
+
+        self.show_menu()
+        return True
+
+    def display_artwork(self, song):
+        pass
+
+    def cancel_artwork(self):
+        pass
+
+    def close(self):
+        self.engine.close()
+
+    def on_song_change(self, song):
+        # Runs on the backend's thread (or the event loop for ffplay); the
+        # screen is updated on the loop
+        if self.ui is not None:
+            self.ui.post(self.show_track_change, song)
+
+    def show_track_change(self, song):
+        # Runs on the event loop for every playback event, so songs that
+        # follow on by themselves are announced without waiting for a command
+        if song is not self.engine.current_song:
+            return  # overtaken by a later command or event
+        if song is None:
+            if self.announced is not None and not self.engine.is_playing():
+                self.announced = None
+                self.ui.notify("Playback finished")
+        elif self.announced is None or song['path'] != self.announced['path']:
+            self.announced = song
+            self.song_started = time.monotonic()
+            self.ui.notify(f"Now playing: {song['artist']} - {song['title']}")
+            self.display_artwork(song)
+
+    def show_elapsed(self):
+        # The terminal title, unlike the screen, can change under a half-typed command
+        if self.announced is None or not sys.stdout.isatty():
+            return
+        elapsed = int(time.monotonic() - self.song_started)
+        song = self.announced
+        sys.stdout.write(f"\033]2;{song['artist']} - {song['title']} [{elapsed // 60}:{elapsed % 60:02d}]\007")
+        sys.stdout.flush()
+
+    async def run_ui(self):
+        from .tui_loop import TuiLoop
+        self.ui = TuiLoop(self.handle_command, on_tick=self.show_elapsed)
+        if self.watch:
+            self.start_watching(self.ui.post)
+        try:
+            await self.ui.run()
+        finally:
+            self.stop_song()
+            self.close()
+            if sys.stdout.isatty():
+                sys.stdout.write("\033]2;\007")
+
+    def command_loop(self):
+        # asyncio is only needed from here on, after the directory prompt
+        import asyncio
+        asyncio.run(self.run_ui())
+
+    def run(self):
+        music_dir = self.choose_directory()
+        self.build_library(music_dir)
+        self.show_menu()
+        self.command_loop()
+
+
+class TerminalPlayer(ConsolePlayer):
+    """The musicplayer3 player: ConsolePlayer plus the play queue, next /
+    previous, shuffle and M3U/PLS playlists."""
+
+    def next_song(self):
+        song = self.engine.next()
+        if song is None:
+            print("End of queue")
+        else:
+            self.show_playing(song)
+
+    def previous_song(self):
+        song = self.engine.previous()
+        if song is None:
+            print("No previous song")
+        else:
+            self.show_playing(song)
+
+    def queue_song(self, song_idx):
+        song = self.engine.enqueue(song_idx)
+        if song is None:
+            print("Invalid song selection")
+        else:
+            print(f"Queued: {song['artist']} - {song['title']} ({len(self.engine.play_queue)} in queue)")
+
+    def toggle_shuffle(self):
+        self.engine.set_shuffle(not self.engine.shuffle)
+        print(f"Shuffle {'on' if self.engine.shuffle else 'off'}")
+
+    def load_playlist(self, path):
+        try:
+            count, missing = self.engine.load_playlist(path)
+        except (OSError, ValueError) as e:
+            print(f"Could not load {path}: {e}")
+            return
+        print(f"Queued {count} songs from {path}" + (f" ({missing} not in library)" if missing else ""))
+
+    def save_playlist(self, path):
+        try:
+            count = self.engine.save_playlist(path)
+        except (OSError, ValueError) as e:
+            print(f"Could not save {path}: {e}")
+            return
+        print(f"Saved {count} songs to {path}")
+
+    def show_menu(self):
+        super().show_menu()
+        print(QUEUE_HELP)
+
+    def handle_command(self, command):
+        choice = command.lower()
+
+        if choice.startswith('a '):
+            try:
+                self.queue_song(int(choice.split()[1]))
+            except (ValueError, IndexError):
+                print("Invalid song number")
+
+        elif choice == 'n':
+            self.next_song()
+
+        elif choice == 'b':
+            self.previous_song()
+
+        elif choice == 'shuffle':
+            self.toggle_shuffle()
+
+        elif choice.startswith('load '):
+            self.load_playlist(os.path.expanduser(command[5:].strip()))
+
+        elif choice.startswith('save '):
+            self.save_playlist(os.path.expanduser(command[5:].strip()))
+
+        else:
+            return super().handle_command(command)
+
+        self.show_menu()
+        return True
+
+
+def main(player_class=TerminalPlayer, description="Terminal music player"):
+    """Parse the common switches and run a terminal player until it quits."""
+    parser = argparse.ArgumentParser(description=description)
+    add_scan_arguments(parser)
+    add_playback_arguments(parser)
+    args = parser.parse_args()
+    use_locale_collation()
+    player = player_class(scan_mode=args.scan_mode, workers=args.workers, backend=args.backend,
+                          watch=args.watch, music_dir=args.music_dir)
+    try:
+        player.run()
+    except KeyboardInterrupt:
+        player.stop_song()
+        print("\nStopped by user")
+    except Exception as e:
+        print(f"Unexpected error: {e}")
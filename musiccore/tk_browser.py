@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+
+import os
+import time
+import tkinter as tk
+from tkinter import ttk
+
+from .dir_browser import DirectoryBrowser
+from .virtual_list import VirtualList
+
+# Keys typed within this long of each other extend the type-ahead prefix
+TYPE_AHEAD_RESET_SECONDS = 1.0
+
+
+def browse_directory(root, on_select, start=None, background=None, browser=None):
+    """Open a window for walking the file system; on_select(path) gets the choice.
+
+    Starts at start, else the directory chosen last time. Typing over the
+    list selects the first directory starting with the typed letters, and
+    a path typed in the field above it is gone to on Return.
+    """
+    browser = browser or DirectoryBrowser()
+    browse_window = tk.Toplevel(root)
+    browse_window.title("Select Music Directory")
+    browse_window.geometry("400x300")
+    if background:
+        browse_window.configure(bg=background)
+
+    current_dir = tk.StringVar()
+    path_text = tk.StringVar()
+    names = []
+    typed = {'prefix': '', 'at': 0.0}
+
+    def show_dir(path):
+        try:
+            listing = browser.subdirs(path)
+        except OSError as e:
+            path_text.set(f"{path}: {e.strerror}")
+            return
+        current_dir.set(path)
+        path_text.set(path)
+        names[:] = listing
+        typed['prefix'] = ''
+        dir_list.reset(len(names))
+
+    def go_to_dir(idx):
+        show_dir(os.path.join(current_dir.get(), names[idx]))
+
+    def go_to_path(event):
+        target = browser.resolve(current_dir.get(), path_text.get().strip())
+        if target is None:
+            browse_window.bell()
+        else:
+            show_dir(target)
+
+    def go_parent():
+        parent = os.path.dirname(current_dir.get())
+        if parent != current_dir.get():
+            show_dir(parent)
+
+    def type_ahead(event):
+        if not event.char.isprintable() or not event.char.strip():
+            return None
+        now = time.monotonic()
+        if now - typed['at'] > TYPE_AHEAD_RESET_SECONDS:
+            typed['prefix'] = ''
+        typed['prefix'] += event.char
+        typed['at'] = now
+        matches = browser.matching(current_dir.get(), typed['prefix'])
+        if matches:
+            dir_list.select(matches[0])
+        else:
+            browse_window.bell()
+        return "break"
+
+    def select_dir():
+        browse_window.destroy()
+        browser.remember(current_dir.get())
+        on_select(current_dir.get())
+
+    path_entry = ttk.Entry(browse_window, textvariable=path_text)
+    path_entry.pack(fill=tk.X, padx=5, pady=5)
+    path_entry.bind("<Return>", go_to_path)
+    dir_list = VirtualList(browse_window, lambda idx: names[idx], on_activate=go_to_dir, height=15)
+    dir_list.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+    dir_list.listbox.bind("<Key>", type_ahead)
+    show_dir(browser.start_dir(start))
+    dir_list.listbox.focus_set()
+
+    ttk.Button(browse_window, text="Parent", command=go_parent).pack(side=tk.LEFT, padx=5, pady=5)
+    ttk.Button(browse_window, text="Select", command=select_dir).pack(side=tk.RIGHT, padx=5, pady=5)
+    return browse_window
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+
+import os
+import threading
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+from .engine import PlayerEngine
+from .tk_browser import browse_directory
+from .virtual_list import VirtualList
+
+SCAN_POLL_MS = 100  # how often the Tk loop checks on the scan
+
+# Colours of the purple look shared by the guimusicplayer2/3 windows
+PURPLE_THEME = {
+    'background': "#2a1a4a",
+    'button': "#6b5b95",
+    'highlight': "#9b59b6",
+    'text': "#e8e8e8",
+}
+
+
+class TkPlayer:
+    """The Tk window the guimusicplayer*.py scripts share.
+
+    A song list (VirtualList, so only visible rows are labelled), Play /
+    Stop / Browse buttons and a status line over a PlayerEngine. The
+    library is scanned on a worker thread that the Tk loop polls with
+    after(). Scripts set title and theme; richer ones override the
+    setup_* steps, control_buttons(), track_at() and build_library().
+    """
+
+    title = "Music Player"
+    theme = None  # colours as in PURPLE_THEME, or None for Tk's own look
+
+    def __init__(self, music_dir=None, **engine_options):
+        self.engine = PlayerEngine(**engine_options)
+        self.music_dir = music_dir
+        self.scan_thread = None
+        self.root = tk.Tk()
+        self.root.title(self.title)
+        self.root.geometry("600x400")
+        self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
+        self.setup_theme()
+        self.setup_gui()
+
+    def setup_theme(self):
+        if self.theme is None:
+            return
+        style = ttk.Style()
+        style.theme_use('default')
+
+        dark_purple = self.theme['background']
+        light_purple = self.theme['button']
+        neon_purple = self.theme['highlight']
+        text_color = self.theme['text']
+
+        self.root.configure(bg=dark_purple)
+        style.configure("TFrame", background=dark_purple)
+        style.configure("TButton",
+                        background=light_purple,
+                        foreground=text_color,
+                        borderwidth=1,
+                        font=("Arial", 10, "bold"))
+        style.map("TButton",
+                  background=[("active", neon_purple)],
+                  foreground=[("active", text_color)])
+        style.configure("TLabel",
+                        background=dark_purple,
+                        foreground=text_color,
+                        font=("Arial", 10))
+
+        self.root.option_add("*Listbox.background", dark_purple)
+        self.root.option_add("*Listbox.foreground", text_color)
+        self.root.option_add("*Listbox.selectBackground", neon_purple)
+        self.root.option_add("*Listbox.selectForeground", text_color)
+        self.root.option_add("*Listbox.font", ("Arial", 10))
+
+    def browse_directory(self):
+        background = self.theme['background'] if self.theme else None
+        browse_directory(self.root, self.build_library, start=self.music_dir, background=background)
+
+    def build_library(self, music_dir):
+        # The scan runs on a worker thread; the Tk loop polls for its result
+        # with after() so the window stays responsive
+        self.status_label.config(text=f"Scanning {music_dir}...")
+        result = {}
+        self.scan_thread = threading.Thread(target=self.scan_worker, args=(music_dir, result), daemon=True)
+        self.scan_thread.start()
+        self.root.after(SCAN_POLL_MS, self.check_scan, self.scan_thread, music_dir, result)
+
+    def scan_worker(self, music_dir, result):
+        # Runs off the Tk thread: never touch widgets here
+        try:
+            result['library'] = self.engine.scan(music_dir)
+        except Exception as e:
+            result['error'] = e
+
+    def check_scan(self, worker, music_dir, result):
+        if worker is not self.scan_thread:
+            return  # a newer scan replaced this one
+        if worker.is_alive():
+            self.root.after(SCAN_POLL_MS, self.check_scan, worker, music_dir, result)
+            return
+        if 'error' in result:
+            self.status_label.config(text=f"Scan failed: {result['error']}")
+            return
+        library = result['library']
+        self.engine.set_library(music_dir, library)
+        # Only the visible rows are ever labelled, however large the library
+        self.song_listbox.reset(len(library))
+        self.status_label.config(text=f"Found {len(library)} songs")
+
+    def track_at(self, row):
+        """Track index shown on list row `row`."""
+        return row
+
+    def song_label(self, row):
+        return self.engine.label(self.track_at(row))
+
+    def play_row(self, row):
+        self.play_song(self.track_at(row))
+
+    def selected_song(self):
+        selection = self.song_listbox.curselection()
+        return self.track_at(selection[0]) if selection else None
+
+    def play_song(self, song_idx=None):
+        if song_idx is None:
+            song_idx = self.selected_song()
+            if song_idx is None:
+                return
+        song = self.engine.play(song_idx)
+        if song is None:
+            messagebox.showerror("Error", "Invalid song selection")
+            return
+        self.show_playing(song)
+
+    def show_playing(self, song):
+        self.status_label.config(text=f"Playing: {song['artist']} - {song['title']}")
+
+    def stop_song(self):
+        if self.engine.stop():
+            self.status_label.config(text="Stopped")
+
+    def setup_gui(self):
+        self.setup_song_list()
+        self.setup_controls()
+        self.status_label = ttk.Label(self.root, text="Select a directory to begin")
+        self.status_label.pack(fill=tk.X, padx=5, pady=5)
+
+    def setup_song_list(self):
+        self.song_listbox = VirtualList(self.root, self.song_label, on_activate=self.play_row, height=15)
+        self.song_listbox.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+    def setup_controls(self):
+        control_frame = ttk.Frame(self.root)
+        control_frame.pack(fill=tk.X, padx=5, pady=5)
+        for text, command in self.control_buttons():
+            ttk.Button(control_frame, text=text, command=command).pack(side=tk.LEFT, padx=5)
+
+    def control_buttons(self):
+        return [("Play", self.play_song), ("Stop", self.stop_song), ("Browse", self.browse_directory)]
+
+    def run(self):
+        self.browse_directory()
+        self.root.mainloop()
+
+    def on_closing(self):
+        self.engine.close()
+        self.root.destroy()
+
+
+def detach_from_terminal():
+    """Fork so the shell gets its prompt back; only the child returns."""
+    pid = os.fork()
+    if pid > 0:
+        # Parent process exits immediately, freeing the terminal
+        exit(0)
+    # Child process runs the GUI, in a session of its own
+    os.setsid()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+
+import os
+import re
+from collections import deque
+from pathlib import Path
+
+from .header_tags import read_header_tags
+
+# Track, disc and year columns are 16-bit; anything larger is a broken tag
+MAX_TAG_NUMBER = 0xFFFF
+
+
+def read_metadata(song_path, header_only=True):
+    """Read the tags and stream details the library needs from one file.
+
+    Returns a plain dict with the TrackTable fields, or None when mutagen
+    does not recognise the file. Length, bitrate, sample rate and channels
+    come from the stream header, so they cost no extra reads. Errors from
+    mutagen are left to the caller so it can report them.
+
+    Common layouts are read by read_header_tags, which skips cover art
+    without reading it; header_only=False, or a file it does not handle,
+    goes through mutagen.File.
+    """
+    audio = read_header_tags(song_path) if header_only else None
+    if audio is None:
+        # Imported here: a library loaded from the index never needs mutagen
+        from mutagen import File
+        audio = File(song_path, easy=True)
+        if audio is None:
+            return None
+    artist = audio.get('artist', ['Unknown'])[0] if 'artist' in audio else 'Unknown'
+    title = audio.get('title', ['Unknown'])[0] if 'title' in audio else Path(song_path).stem
+    album = audio.get('album', [''])[0] if 'album' in audio else ''
+    info = getattr(audio, 'info', None)
+    return {
+        'path': song_path,
+        'artist': artist,
+        'title': title,
+        'album': album,
+        'duration': float(getattr(info, 'length', 0) or 0),
+        'bitrate': int(getattr(info, 'bitrate', 0) or 0),
+        'sample_rate': int(getattr(info, 'sample_rate', 0) or 0),
+        'channels': int(getattr(info, 'channels', 0) or 0),
+        'track_number': _tag_number(audio, 'tracknumber'),
+        'disc_number': _tag_number(audio, 'discnumber'),
+        'year': _tag_number(audio, 'date')
+    }
+
+
+def _tag_number(audio, key):
+    # Leading digits only: "3/12" for track and disc numbers, "1999-05-01" for dates
+    if key not in audio:
+        return 0
+    match = re.match(r'\s*(\d+)', str(audio[key][0]))
+    value = int(match.group(1)) if match else 0
+    return value if value <= MAX_TAG_NUMBER else 0
+
+
+def _read_chunk(paths):
+    # Runs in a worker process; errors travel back as strings so the parent
+    # can report them in order
+    results = []
+    for song_path in paths:
+        try:
+            results.append((read_metadata(song_path), None))
+        except Exception as e:
+            results.append((None, str(e)))
+    return results
+
+
+def _chunks(paths, chunk_size):
+    chunk = []
+    for song_path in paths:
+        chunk.append(song_path)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def read_metadata_many(paths, workers=None, chunk_size=64):
+    """Read tags for many files, spreading chunks over worker processes.
+
+    paths may be a generator (such as a directory walk); chunks are sent to
+    the pool as soon as they fill up, so reading overlaps the walk. Yields
+    (path, metadata) in the same order as paths, with metadata None for
+    files that could not be read; failures are reported as they are
+    reached, like the serial loop did. workers=1 reads in this process.
+    """
+    workers = workers or os.cpu_count() or 1
+    executor = None
+    inflight = deque()
+
+    def finished(chunk, results):
+        for song_path, (meta, error) in zip(chunk, results):
+            if error is not None:
+                print(f"Skipping {song_path}: {error}")
+            yield song_path, meta
+
+    try:
+        for chunk in _chunks(paths, chunk_size):
+            if workers == 1:
+                yield from finished(chunk, _read_chunk(chunk))
+                continue
+            if executor is None:
+                # Only a full chunk means there may be enough work for a pool;
+                # a lone partial chunk is read in-process below
+                if len(chunk) < chunk_size:
+                    yield from finished(chunk, _read_chunk(chunk))
+                    continue
+                from concurrent.futures import ProcessPoolExecutor
+                executor = ProcessPoolExecutor(max_workers=workers)
+            inflight.append((chunk, executor.submit(_read_chunk, chunk)))
+            # Hand back finished chunks in order, keeping the pool busy
+            while inflight and (inflight[0][1].done() or len(inflight) > workers * 2):
+                chunk, future = inflight.popleft()
+                yield from finished(chunk, future.result())
+        while inflight:
+            chunk, future = inflight.popleft()
+            yield from finished(chunk, future.result())
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
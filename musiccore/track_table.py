@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+
+import os
+from array import array
+from hashlib import blake2b
+
+# Everything the library keeps per track, in the order append() takes it.
+# duration to year come from the same pass as the tags, 0 meaning unknown;
+# added is when the library index first saw the file (its mtime then), and
+# track_id is path_track_id(path).
+TRACK_FIELDS = ('path', 'artist', 'title', 'album', 'duration', 'bitrate', 'sample_rate', 'channels',
+                'track_number', 'disc_number', 'year', 'added', 'track_id')
+
+
+def path_track_id(path):
+    """The track ID of the file at path: a signed 64-bit hash of the normalised path.
+
+    It depends on nothing but the path, so it is the same across rescans,
+    runs and rebuilt indexes, and fits an SQLite INTEGER.
+    """
+    digest = blake2b(os.path.normpath(path).encode('utf-8', 'surrogateescape'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+
+def format_duration(seconds):
+    """'3:07' or '1:02:03' for a length in seconds; '' when it is unknown."""
+    if not seconds:
+        return ''
+    minutes, secs = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes}:{secs:02d}"
+
+
+class Track:
+    """One library entry: a view of a TrackTable row.
+
+    Supports song['artist'] style access like the old dicts, and
+    song.artist. Making one stores the table and the index; each field is
+    read from its column when asked for. set() edits show through, while
+    without() builds a new table, so a Track of the old one keeps its values.
+    """
+    __slots__ = ('_columns', '_table', '_idx')
+
+    def __init__(self, table, idx):
+        self._columns = table._columns
+        self._table = table
+        self._idx = idx
+
+    def __getitem__(self, key):
+        try:
+            return self._columns[key][self._idx]
+        except KeyError:
+            pass
+        if key == 'artist':
+            return self._table.artist(self._idx)
+        if key == 'album':
+            return self._table.album(self._idx)
+        raise KeyError(key)
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __repr__(self):
+        return f"Track({self.path!r}, {self.artist!r}, {self.title!r}, {self.album!r})"
+
+
+class _StringPool:
+    # Stores each distinct string once and hands out small integer ids
+    def __init__(self):
+        self.strings = []
+        self.ids = {}
+
+    def intern(self, value):
+        string_id = self.ids.get(value)
+        if string_id is None:
+            string_id = self.ids[value] = len(self.strings)
+            self.strings.append(value)
+        return string_id
+
+    def intern_all(self, values):
+        # Python only runs once per distinct string; the ids are looked up by map() in C
+        for value in dict.fromkeys(values):
+            if value not in self.ids:
+                self.ids[value] = len(self.strings)
+                self.strings.append(value)
+        return list(map(self.ids.__getitem__, values))
+
+
+class TrackTable:
+    """Column-oriented track storage indexed by position.
+
+    Paths and titles are kept in parallel lists; artists and albums repeat a
+    lot, so they are interned and stored as ids in compact arrays. The
+    table answers the same questions the old {idx: {...}} library did:
+    `idx in table`, `table[idx]`, `len(table)` and `table.items()`.
+
+    Indexes are positions, and removing rows (without()) renumbers the
+    ones after them. Anything kept across library changes, such as the
+    play queue, holds track IDs instead (ids[idx], see path_track_id):
+    row(track_id) and find(path) map them back to the current index
+    through one dict, only built the first time it is needed.
+
+    Compared with a dict per track this holds less than half the memory
+    (benchmarks/bench_track_table.py). table[idx] makes a Track that reads
+    each field from its column, which is slower than a dict lookup, so code
+    that looks up many tracks indexes the columns (paths[idx], titles[idx])
+    and code that goes over them uses rows(), which zips slices of the
+    columns and iterates faster than dicts do. extend() fills each column
+    once per batch of rows, which is how the index loads a library;
+    append() and hashing paths for their IDs are the slow way in.
+
+    Length, bitrate, sample rate, channels, track and disc number and year
+    are numeric columns too, read along with the tags, so sorting, grouping
+    and totals never go back to the files. `version` changes whenever rows
+    are edited in place by set(), for caches such as LibraryViews that are
+    otherwise only extended as rows are appended.
+    """
+
+    def __init__(self):
+        self.paths = []
+        self.titles = []
+        self.artist_ids = array('I')
+        self.album_ids = array('I')
+        self.durations = array('f')  # seconds
+        self.bitrates = array('I')  # bits per second
+        self.sample_rates = array('I')
+        self.channels = array('H')
+        self.track_numbers = array('H')
+        self.disc_numbers = array('H')
+        self.years = array('H')
+        self.added = array('d')  # Unix time
+        self.ids = array('q')
+        self.version = 0
+        self._artists = _StringPool()
+        self._albums = _StringPool()
+        self._rows = None  # track ID -> index
+        # What Track reads each field from; artist and album go through the pools
+        self._columns = {'path': self.paths, 'title': self.titles, 'duration': self.durations,
+                         'bitrate': self.bitrates, 'sample_rate': self.sample_rates, 'channels': self.channels,
+                         'track_number': self.track_numbers, 'disc_number': self.disc_numbers,
+                         'year': self.years, 'added': self.added, 'track_id': self.ids}
+
+    @classmethod
+    def from_records(cls, records):
+        table = cls()
+        table.extend((record['path'], record['artist'], record['title'], record.get('album', ''))
+                     + tuple(map(record.get, TRACK_FIELDS[4:])) for record in records)
+        return table
+
+    def append(self, path, artist, title, album='', duration=0.0, bitrate=0, sample_rate=0, channels=0,
+               track_number=0, disc_number=0, year=0, added=0.0, track_id=None):
+        self.paths.append(path)
+        self.titles.append(title)
+        self.artist_ids.append(self._artists.intern(artist))
+        self.album_ids.append(self._albums.intern(album))
+        # None (a column the index did not have yet) is stored as unknown
+        self.durations.append(duration or 0.0)
+        self.bitrates.append(bitrate or 0)
+        self.sample_rates.append(sample_rate or 0)
+        self.channels.append(channels or 0)
+        self.track_numbers.append(track_number or 0)
+        self.disc_numbers.append(disc_number or 0)
+        self.years.append(year or 0)
+        self.added.append(added or 0.0)
+        # Loaded from the index, the ID is already known
+        self.ids.append(path_track_id(path) if track_id is None else track_id)
+        if self._rows is not None:
+            self._rows[self.ids[-1]] = len(self.paths) - 1
+        return len(self.paths) - 1
+
+    def extend(self, rows):
+        """Append rows of TRACK_FIELDS, as LibraryIndex stores them; returns how many.
+
+        Each column is extended once for all the rows rather than a dozen
+        appends per row. Missing fields (None) are stored as unknown, like
+        append() does.
+        """
+        rows = list(rows)
+        if not rows:
+            return 0
+        start = len(self.paths)
+        (paths, artists, titles, albums, durations, bitrates, sample_rates, channels, track_numbers,
+         disc_numbers, years, added, track_ids) = zip(*rows)
+        self.paths.extend(paths)
+        self.titles.extend(titles)
+        self.artist_ids.extend(array('I', self._artists.intern_all(artists)))
+        self.album_ids.extend(array('I', self._albums.intern_all(albums)))
+        for column, values in ((self.durations, durations), (self.bitrates, bitrates),
+                               (self.sample_rates, sample_rates), (self.channels, channels),
+                               (self.track_numbers, track_numbers), (self.disc_numbers, disc_numbers),
+                               (self.years, years), (self.added, added)):
+            # Extending from an array is a copy; from a tuple, one resize per item
+            column.extend(array(column.typecode, [value or 0 for value in values] if None in values else values))
+        if None in track_ids:
+            track_ids = [path_track_id(path) if track_id is None else track_id
+                         for path, track_id in zip(paths, track_ids)]
+        self.ids.extend(array('q', track_ids))
+        if self._rows is not None:
+            self._rows.update(zip(self.ids[start:], range(start, len(self.paths))))
+        return len(rows)
+
+    def row(self, track_id):
+        """Return the current index of the track with this ID, or None."""
+        rows = self._rows
+        if rows is None:
+            # Stored once complete: the backend thread looks songs up too
+            rows = dict(zip(self.ids, range(len(self.ids))))
+            self._rows = rows
+        return rows.get(track_id)
+
+    def find(self, path):
+        """Return the index of the track at path, or None."""
+        return self.row(path_track_id(path))
+
+    def set(self, idx, artist, title, album='', duration=0.0, bitrate=0, sample_rate=0, channels=0,
+            track_number=0, disc_number=0, year=0, added=0.0, track_id=None):
+        """Replace the tags of the track at idx, e.g. after the file was retagged.
+
+        The path, and with it the track ID, stays the same.
+        """
+        self.titles[idx] = title
+        self.artist_ids[idx] = self._artists.intern(artist)
+        self.album_ids[idx] = self._albums.intern(album)
+        self.durations[idx] = duration or 0.0
+        self.bitrates[idx] = bitrate or 0
+        self.sample_rates[idx] = sample_rate or 0
+        self.channels[idx] = channels or 0
+        self.track_numbers[idx] = track_number or 0
+        self.disc_numbers[idx] = disc_number or 0
+        self.years[idx] = year or 0
+        self.added[idx] = added or 0.0
+        self.version += 1
+
+    def without(self, removed):
+        """Return a copy minus the rows in `removed`; later rows move up,
+        and keep their track IDs."""
+        table = TrackTable()
+        table.extend(self.record(idx) for idx in range(len(self.paths)) if idx not in removed)
+        return table
+
+    def record(self, idx):
+        """All of the track's fields as a tuple, in TRACK_FIELDS order."""
+        return (self.paths[idx], self._artists.strings[self.artist_ids[idx]], self.titles[idx],
+                self._albums.strings[self.album_ids[idx]], self.durations[idx], self.bitrates[idx],
+                self.sample_rates[idx], self.channels[idx], self.track_numbers[idx],
+                self.disc_numbers[idx], self.years[idx], self.added[idx], self.ids[idx])
+
+    def total_duration(self, indexes=None):
+        """Summed length in seconds of the given tracks (all by default); unknown lengths count as 0."""
+        if indexes is None:
+            return sum(self.durations)
+        durations = self.durations
+        return sum(durations[idx] for idx in indexes)
+
+    def artist(self, idx):
+        return self._artists.strings[self.artist_ids[idx]]
+
+    def album(self, idx):
+        return self._albums.strings[self.album_ids[idx]]
+
+    @property
+    def distinct_artists(self):
+        """Every artist name once, indexed by the ids in artist_ids."""
+        return self._artists.strings
+
+    @property
+    def distinct_albums(self):
+        return self._albums.strings
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __contains__(self, idx):
+        return isinstance(idx, int) and 0 <= idx < len(self.paths)
+
+    def __getitem__(self, idx):
+        if not (isinstance(idx, int) and 0 <= idx < len(self.paths)):
+            raise KeyError(idx)
+        return Track(self, idx)
+
+    def __iter__(self):
+        return iter(range(len(self.paths)))
+
+    def items(self):
+        for idx in range(len(self.paths)):
+            yield idx, Track(self, idx)
+
+    def rows(self, start=0, stop=None):
+        """Iterate (idx, artist, title) straight from the columns, without building Tracks."""
+        stop = len(self.paths) if stop is None else min(stop, len(self.paths))
+        # Slices of the rows asked for, walked by zip and map in C
+        return zip(range(start, stop), map(self._artists.strings.__getitem__, self.artist_ids[start:stop]),
+                   self.titles[start:stop])
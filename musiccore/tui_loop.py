@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+
+import asyncio
+import os
+import sys
+
+# How often on_tick runs, e.g. to refresh the elapsed time
+TICK_SECONDS = 1.0
+
+
+class TuiLoop:
+    """Line-based terminal UI driven by one asyncio event loop.
+
+    Keyboard input is read from stdin with loop.add_reader, so commands,
+    playback events and timers are all handled on the loop and nothing
+    waits on input(). Each complete line goes to on_line(line); returning
+    False ends run(). Player threads hand work to the loop with post(),
+    and notify() / above_prompt() write above the prompt without mixing
+    into it.
+    """
+
+    def __init__(self, on_line, on_tick=None, prompt="> "):
+        self.on_line = on_line
+        self.on_tick = on_tick
+        self.prompt = prompt
+        self.loop = None
+        self._done = None
+        self._buffer = b''
+
+    async def run(self):
+        self.loop = asyncio.get_running_loop()
+        self._done = self.loop.create_future()
+        fd = sys.stdin.fileno()
+        self.loop.add_reader(fd, self._on_input, fd)
+        ticker = self.loop.create_task(self._tick()) if self.on_tick else None
+        self.show_prompt()
+        try:
+            await self._done
+        finally:
+            self.loop.remove_reader(fd)
+            if ticker:
+                ticker.cancel()
+
+    def stop(self):
+        if self._done is not None and not self._done.done():
+            self._done.set_result(None)
+
+    def post(self, callback, *args):
+        """Run callback(*args) on the event loop; safe from any thread."""
+        if self.loop is not None and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(callback, *args)
+
+    def notify(self, text):
+        self.above_prompt(lambda: sys.stdout.write(text))
+
+    def above_prompt(self, write):
+        """Clear the prompt line, let write() output there, then redraw the prompt below."""
+        sys.stdout.write("\r\033[2K")
+        write()
+        sys.stdout.write(f"\n{self.prompt}")
+        sys.stdout.flush()
+
+    def show_prompt(self):
+        sys.stdout.write(self.prompt)
+        sys.stdout.flush()
+
+    def _on_input(self, fd):
+        # Read what is there instead of readline(), which could buffer
+        # several piped lines where add_reader would never see them
+        data = os.read(fd, 4096)
+        if not data:
+            self.stop()
+            return
+        *lines, self._buffer = (self._buffer + data).split(b'\n')
+        for line in lines:
+            if self.on_line(line.decode('utf-8', errors='replace').strip()) is False:
+                self.stop()
+                return
+        if lines:
+            self.show_prompt()
+
+    async def _tick(self):
+        while True:
+            await asyncio.sleep(TICK_SECONDS)
+            self.on_tick()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+
+import tkinter as tk
+import tkinter.font as tkfont
+from tkinter import ttk
+
+
+class VirtualList(ttk.Frame):
+    """A list view that only holds the rows currently on screen.
+
+    The widget is told how many rows exist (set_row_count) and asks
+    row_text(idx) for the label of each visible row as the view scrolls,
+    so filling it costs the same for ten tracks or two hundred thousand.
+    Selection, curselection(), double-click / Return activation and keyboard
+    navigation work on the virtual row numbers.
+    """
+
+    def __init__(self, master, row_text, on_activate=None, **listbox_options):
+        super().__init__(master)
+        self.row_text = row_text
+        self.on_activate = on_activate
+        self.row_count = 0
+        self.top = 0
+        self.visible_rows = 1
+        self.selected = None
+
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.listbox = tk.Listbox(self, activestyle='none', exportselection=False, **listbox_options)
+        self.listbox.pack(fill=tk.BOTH, expand=True)
+        self.line_height = tkfont.Font(font=self.listbox.cget('font')).metrics('linespace') + 1
+
+        self.listbox.bind("<Configure>", self._on_resize)
+        self.listbox.bind("<<ListboxSelect>>", self._on_click)
+        self.listbox.bind("<Double-1>", lambda e: self._activate())
+        self.listbox.bind("<Return>", lambda e: self._activate())
+        self.listbox.bind("<MouseWheel>", lambda e: self._scroll(-1 if e.delta > 0 else 1, 'units'))
+        self.listbox.bind("<Button-4>", lambda e: self._scroll(-1, 'units'))
+        self.listbox.bind("<Button-5>", lambda e: self._scroll(1, 'units'))
+        self.listbox.bind("<Up>", lambda e: self._move_selection(-1))
+        self.listbox.bind("<Down>", lambda e: self._move_selection(1))
+        self.listbox.bind("<Prior>", lambda e: self._move_selection(-self.visible_rows))
+        self.listbox.bind("<Next>", lambda e: self._move_selection(self.visible_rows))
+        self.listbox.bind("<Home>", lambda e: self._select(0))
+        self.listbox.bind("<End>", lambda e: self._select(self.row_count - 1))
+
+    def set_row_count(self, row_count):
+        """Change the number of rows; only the visible window is redrawn."""
+        self.row_count = row_count
+        if self.selected is not None and self.selected >= row_count:
+            self.selected = None
+        self._render()
+
+    def reset(self, row_count):
+        """Show a different set of rows from the top, clearing the selection."""
+        self.top = 0
+        self.selected = None
+        self.set_row_count(row_count)
+
+    def refresh(self):
+        self._render()
+
+    def curselection(self):
+        return () if self.selected is None else (self.selected,)
+
+    def select(self, idx):
+        """Select row idx and scroll it into view."""
+        self._select(idx)
+
+    def see(self, idx):
+        if idx < self.top:
+            self.top = idx
+        elif idx >= self.top + self.visible_rows:
+            self.top = idx - self.visible_rows + 1
+        self._render()
+
+    def yview(self, *args):
+        # Scrollbar protocol: ('moveto', fraction) or ('scroll', n, 'units'|'pages')
+        if args[0] == 'moveto':
+            self.top = int(float(args[1]) * self.row_count)
+            self._render()
+        elif args[0] == 'scroll':
+            self._scroll(int(args[1]), args[2])
+
+    def _scroll(self, amount, what):
+        step = self.visible_rows if what == 'pages' else 1
+        self.top += amount * step
+        self._render()
+        return "break"
+
+    def _render(self):
+        self.top = max(0, min(self.top, self.row_count - self.visible_rows))
+        stop = min(self.top + self.visible_rows, self.row_count)
+        self.listbox.delete(0, tk.END)
+        if stop > self.top:
+            self.listbox.insert(tk.END, *(self.row_text(idx) for idx in range(self.top, stop)))
+        if self.selected is not None and self.top <= self.selected < stop:
+            self.listbox.selection_set(self.selected - self.top)
+        if self.row_count:
+            self.scrollbar.set(self.top / self.row_count, stop / self.row_count)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def _on_resize(self, event):
+        rows = max(1, event.height // self.line_height)
+        if rows != self.visible_rows:
+            self.visible_rows = rows
+            self._render()
+
+    def _on_click(self, event):
+        selection = self.listbox.curselection()
+        if selection:
+            self.selected = self.top + selection[0]
+
+    def _select(self, idx):
+        if self.row_count:
+            self.selected = max(0, min(idx, self.row_count - 1))
+            self.see(self.selected)
+        return "break"
+
+    def _move_selection(self, delta):
+        return self._select(0 if self.selected is None else self.selected + delta)
+
+    def _activate(self):
+        if self.on_activate is not None and self.selected is not None:
+            self.on_activate(self.selected)
+        return "break"